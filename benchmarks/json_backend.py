@@ -0,0 +1,110 @@
+"""
+Compare JSON backends on the sample application from the test suite.
+
+Run with ``python benchmarks/json_backend.py``.  Backends that aren't
+installed are skipped.
+
+"""
+
+import os
+import sys
+import timeit
+
+import webtest
+from pyramid.config import Configurator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "tests"))
+
+import sampleapp  # noqa: E402
+
+from pyramid_marshmallow.jsonbackend import get_backend  # noqa: E402
+
+BACKENDS = ["json", "orjson", "msgspec"]
+NUMBER = 200
+
+
+def export(request):
+    for i in range(1000):
+        yield {
+            "title": f"Volume {i}",
+            "release_date": sampleapp.Date(1971, 12, 17),
+            "artists": ["Bowie", "Ronson"],
+        }
+
+
+def make_app(backend):
+    settings = {
+        "marshmallow.json_backend": backend,
+        "openapi.title": "Sample",
+        "openapi.version": "1.0",
+        "openapi.openapi_version": "3.0.2",
+    }
+    with Configurator(settings=settings) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        config.add_route("validate", "/validate")
+        config.add_view(
+            sampleapp.validate,
+            route_name="validate",
+            validate=sampleapp.AlbumSchema(),
+            request_method="POST",
+        )
+        config.add_route("export", "/export")
+        config.add_view(
+            export,
+            route_name="export",
+            marshal=sampleapp.AlbumSchema(many=True),
+            marshal_stream=True,
+        )
+        config.add_route("spec", "/spec.json")
+        config.add_openapi_json_view(route_name="spec")
+        config.add_route("html", "/spec.html")
+        config.add_openapi_html_view(route_name="html")
+        return webtest.TestApp(config.make_wsgi_app())
+
+
+def run(backend):
+    app = make_app(backend)
+    body = {"title": "Hunky Dory", "release_date": "1971-12-17"}
+    cases = {
+        "validate": lambda: app.post_json("/validate", body),
+        "stream 1k": lambda: app.get("/export"),
+        "spec.json": lambda: app.get("/spec.json"),
+        "spec.json?pretty": lambda: app.get("/spec.json?pretty"),
+        "spec.html": lambda: app.get("/spec.html"),
+    }
+    results = {}
+    for name, case in cases.items():
+        case()  # Warm up caches
+        elapsed = timeit.timeit(case, number=NUMBER)
+        results[name] = elapsed / NUMBER * 1e6
+    return results
+
+
+def main():
+    results = {}
+    for backend in BACKENDS:
+        try:
+            get_backend(backend)
+        except ImportError:
+            sys.stderr.write(f"Skipping {backend}, not installed.\n")
+            continue
+        results[backend] = run(backend)
+    cases = next(iter(results.values()))
+    sys.stdout.write(
+        "case".ljust(20)
+        + "".join(backend.rjust(12) for backend in results)
+        + "\n"
+    )
+    for case in cases:
+        sys.stdout.write(
+            case.ljust(20)
+            + "".join(
+                f"{results[backend][case]:10.1f}us" for backend in results
+            )
+            + "\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark the validation and marshalling view derivers and spec generation.
+
+Run with ``python benchmarks/run.py``.  Results are printed and, with
+``--output``, written as JSON.  Pass ``--compare`` with a previous results
+file to show the relative change for each benchmark.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from importlib.metadata import version
+
+import webtest
+from pyramid.config import Configurator
+from pyramid.response import Response
+from pyramid.testing import DummyRequest
+from webob.multidict import MultiDict
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), "tests")
+)
+
+from conftest import make_info  # noqa: E402
+from shapes import SHAPES  # noqa: E402
+
+from pyramid_marshmallow import view_marshaller, view_validator  # noqa: E402
+from pyramid_marshmallow.openapi.spec import create_spec  # noqa: E402
+
+SETTINGS = {
+    "openapi.title": "Benchmark",
+    "openapi.version": "1.0",
+    "openapi.openapi_version": "3.0.2",
+}
+
+MODES = {
+    "plain": {},
+    "compiled": {"marshmallow.compile": "true"},
+}
+
+
+def ok(request):
+    return Response()
+
+
+def make_request(shape):
+    request = DummyRequest()
+    request.method = shape.method
+    if shape.method == "GET":
+        request.GET = MultiDict(shape.raw)
+    else:
+        request.json_body = shape.raw
+    return request
+
+
+def direct_cases(shape, mode, settings):
+    """
+    Call the derived views directly, without Pyramid's router.
+
+    """
+    validate = view_validator(
+        lambda context, request: None,
+        make_info(settings, validate=shape.schema),
+    )
+    marshal = view_marshaller(
+        lambda context, request: shape.obj,
+        make_info(settings, marshal=shape.schema),
+    )
+    request = make_request(shape)
+    yield (
+        f"direct.validate.{shape.name}.{mode}",
+        lambda: validate(None, request),
+    )
+    yield f"direct.marshal.{shape.name}.{mode}", lambda: marshal(None, request)
+
+
+def make_app(shape, settings):
+    def echo(request):
+        return shape.obj
+
+    with Configurator(settings=dict(SETTINGS, **settings)) as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("validate", "/validate")
+        config.add_view(ok, route_name="validate", validate=shape.schema)
+        config.add_route("marshal", "/marshal")
+        config.add_view(
+            echo,
+            route_name="marshal",
+            marshal=shape.schema,
+            renderer="json",
+        )
+        return webtest.TestApp(config.make_wsgi_app())
+
+
+def webtest_cases(shape, mode, settings):
+    """
+    Send requests through a full Pyramid application.
+
+    """
+    app = make_app(shape, settings)
+    if shape.method == "GET":
+
+        def validate():
+            app.get("/validate", shape.raw)
+
+    else:
+
+        def validate():
+            app.post_json("/validate", shape.raw)
+
+    yield f"webtest.validate.{shape.name}.{mode}", validate
+    yield f"webtest.marshal.{shape.name}.{mode}", lambda: app.get("/marshal")
+
+
+def spec_cases(routes=100):
+    """
+    Generate a spec for an application with many routes of every shape.
+
+    """
+    shapes = [factory() for factory in SHAPES]
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        for i in range(routes):
+            shape = shapes[i % len(shapes)]
+            name = f"{shape.name}{i}"
+            config.add_route(name, "/" + name)
+            config.add_view(
+                ok,
+                route_name=name,
+                request_method=shape.method,
+                validate=shape.schema,
+                marshal=shape.schema,
+                renderer="json",
+            )
+        config.commit()
+        registry = config.registry
+    yield f"spec.create_spec.{routes}", lambda: create_spec(registry)
+
+
+def all_cases():
+    for factory in SHAPES:
+        shape = factory()
+        for mode, settings in MODES.items():
+            yield from direct_cases(shape, mode, settings)
+            yield from webtest_cases(shape, mode, settings)
+    yield from spec_cases()
+
+
+def measure(func, repeat, min_time):
+    """
+    Return the best time per call, in seconds, over `repeat` runs of at
+    least `min_time` seconds each.
+
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number, number
+
+
+def metadata():
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "packages": {
+            name: version(name)
+            for name in ("pyramid-marshmallow", "marshmallow", "pyramid")
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--output", help="Write results as JSON to a file.")
+    parser.add_argument(
+        "--compare",
+        help="A previous JSON results file to compare against.",
+    )
+    parser.add_argument(
+        "-k",
+        dest="pattern",
+        help="Only run benchmarks with names containing this string.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    baseline = dict()
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = {
+                result["name"]: result["seconds"]
+                for result in json.load(fh)["results"]
+            }
+
+    results = []
+    for name, func in all_cases():
+        if args.pattern and args.pattern not in name:
+            continue
+        func()  # Warm up
+        seconds, number = measure(func, args.repeat, args.min_time)
+        results.append({"name": name, "seconds": seconds, "number": number})
+        line = f"{name:<40} {seconds * 1e6:12.1f}us"
+        if name in baseline:
+            change = seconds / baseline[name] - 1
+            line += f"  {change:+7.1%}"
+        sys.stdout.write(line + "\n")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(
+                {"metadata": metadata(), "results": results},
+                fh,
+                indent=2,
+            )
+            fh.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
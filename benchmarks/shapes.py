@@ -0,0 +1,100 @@
+"""
+Schema shapes exercised by the benchmark suite.
+
+Each shape provides a schema, the payload a client would send (`raw`), the
+objects a view would return (`obj`) and the HTTP method used to send `raw`.
+
+"""
+
+from collections import namedtuple
+from datetime import date
+
+from marshmallow import Schema, fields
+
+Shape = namedtuple("Shape", ["name", "schema", "raw", "obj", "method"])
+
+
+class FlatSchema(Schema):
+    id = fields.Int()
+    title = fields.Str()
+    subtitle = fields.Str(allow_none=True)
+    explicit = fields.Bool()
+    rating = fields.Float()
+    release_date = fields.Date()
+    label = fields.Str()
+    catalog = fields.Str(data_key="catalogNumber")
+    tracks = fields.Int()
+    length = fields.Int()
+
+
+FLAT_RAW = {
+    "id": 1,
+    "title": "Hunky Dory",
+    "subtitle": None,
+    "explicit": False,
+    "rating": 4.5,
+    "release_date": "1971-12-17",
+    "label": "RCA",
+    "catalogNumber": "LSP-4623",
+    "tracks": 11,
+    "length": 2497,
+}
+
+FLAT_OBJ = dict(
+    FLAT_RAW,
+    release_date=date(1971, 12, 17),
+    catalog=FLAT_RAW["catalogNumber"],
+)
+del FLAT_OBJ["catalogNumber"]
+
+
+def flat():
+    return Shape("flat", FlatSchema(), FLAT_RAW, FLAT_OBJ, "POST")
+
+
+def wide(width=200):
+    schema = Schema.from_dict(
+        {f"field{i}": fields.Str() for i in range(width)}
+    )()
+    raw = {f"field{i}": f"value {i}" for i in range(width)}
+    return Shape("wide", schema, raw, raw, "POST")
+
+
+def nested(depth=8):
+    fields_ = {"name": fields.Str(), "value": fields.Int()}
+    raw = {"name": "leaf", "value": 0}
+    for i in range(depth):
+        fields_ = {
+            "name": fields.Str(),
+            "value": fields.Int(),
+            "child": fields.Nested(Schema.from_dict(fields_)),
+        }
+        raw = {"name": f"level {i}", "value": i, "child": raw}
+    schema = Schema.from_dict(fields_)()
+    return Shape("nested", schema, raw, raw, "POST")
+
+
+def large_list(length=1000):
+    schema = Schema.from_dict(
+        {"items": fields.Nested(FlatSchema, many=True)}
+    )()
+    raw = {"items": [dict(FLAT_RAW, id=i) for i in range(length)]}
+    obj = {"items": [dict(FLAT_OBJ, id=i) for i in range(length)]}
+    return Shape("list", schema, raw, obj, "POST")
+
+
+def query(length=200):
+    schema = Schema.from_dict(
+        {
+            "q": fields.Str(),
+            "page": fields.Int(),
+            "ids": fields.List(fields.Int()),
+        }
+    )()
+    raw = [("q", "bowie"), ("page", "2")]
+    raw.extend(("ids", str(i)) for i in range(length))
+    obj = {"q": "bowie", "page": 2, "ids": list(range(length))}
+    return Shape("query", schema, raw, obj, "GET")
+
+
+SHAPES = [flat, wide, nested, large_list, query]
@@ -1,13 +1,57 @@
+import functools
+
 from marshmallow import Schema, ValidationError, fields
+from pyramid.events import ApplicationCreated
+from pyramid.exceptions import ConfigurationError
 from pyramid.response import Response
+from pyramid.settings import asbool
 from pyramid.viewderivers import VIEW
 
+from .aio import awaiting_view, is_coroutine_view, iter_async
+from .compiler import compile_dumper, compile_loader
+from .failfast import fail_fast_loader
+from .jsonbackend import json_renderer_factory, settings_backend
+from .limits import check_body, view_limits
+from .metrics import (
+    IMetricsSink,
+    measure_dump,
+    measure_load,
+    set_metrics_sink,
+    view_name,
+)
+from .offload import (
+    DEFAULT_ITEMS,
+    DEFAULT_THRESHOLD,
+    IOffloadPool,
+    OffloadPool,
+    offload_collections,
+    start_pool,
+)
+from .schemacache import ISchemaCache, SchemaCache
+from .streaming import iter_json_array, iter_json_array_items
+
 __all__ = [
     "ValidationError",
 ]
 
 
 def includeme(config):
+    config.registry.registerUtility(SchemaCache(), ISchemaCache)
+    settings = config.get_settings()
+    config.registry.registerUtility(
+        OffloadPool(settings.get("marshmallow.offload_processes")),
+        IOffloadPool,
+    )
+    config.add_subscriber(start_pool, ApplicationCreated)
+    config.add_renderer("marshmallow_json", json_renderer_factory)
+    config.add_directive("set_metrics_sink", set_metrics_sink)
+    config.add_directive(
+        "warm_marshmallow_schemas",
+        "pyramid_marshmallow.warmup.warm_marshmallow_schemas",
+    )
+    sink = settings.get("marshmallow.metrics_sink")
+    if sink:
+        config.set_metrics_sink(sink)
     config.add_view_deriver(view_validator)
     config.add_view_deriver(view_marshaller, under="rendered_view", over=VIEW)
     config.add_view_deriver(view_api_spec)
@@ -23,10 +67,11 @@ def make_schema(schema=None, **kwargs):
     return Schema.from_dict(schema or kwargs)
 
 
-def process_schema(schema):
+def process_schema(schema, registry=None):
     """
     Handle a schema passed in as a view deriver, creating a nonce schema if a
-    dictionary.
+    dictionary.  If a registry is given, schemas created from structurally
+    identical dictionaries are shared.
 
     """
     if schema is None:
@@ -34,52 +79,361 @@ def process_schema(schema):
     elif isinstance(schema, Schema):
         return schema
     elif isinstance(schema, dict):
+        if registry is not None:
+            cache = registry.queryUtility(ISchemaCache)
+            if cache is not None:
+                return cache.get(schema)
         return Schema.from_dict(schema)()
     else:
         raise TypeError("Schema is of invalid type.")
 
 
+def _flag(info, option, setting):
+    """
+    Read a boolean view option, falling back to the `marshmallow.*` setting of
+    the given name if the option is not set.
+
+    """
+    value = info.options.get(option)
+    if value is None:
+        value = (info.settings or {}).get("marshmallow." + setting)
+    return asbool(value)
+
+
 def view_validator(view, info):
-    schema = process_schema(info.options.get("validate"))
+    schema = process_schema(info.options.get("validate"), info.registry)
     if schema is None:
         return view
+    load = schema.load
+    max_errors = info.options.get("validate_max_errors")
+    if max_errors is None:
+        max_errors = (info.settings or {}).get("marshmallow.max_errors")
+    if max_errors:
+        # Fail-fast loading modifies the schema, so use a copy.
+        load = fail_fast_loader(_project(schema, None), int(max_errors))
+    if _flag(info, "validate_compiled", "compile"):
+        load = compile_loader(schema, fallback=load)
+    backend = settings_backend(info.settings)
+    list_keys = _list_keys(schema)
+    # The parameter selecting fields to marshal isn't part of the input.
+    ignored = (
+        FIELDS_PARAM if asbool(info.options.get("marshal_fields")) else None
+    )
+    stream = asbool(info.options.get("validate_stream"))
+    if stream and not schema.many:
+        raise ConfigurationError(
+            "`validate_stream` requires a schema with `many=True`."
+        )
+    limits = view_limits(
+        schema, info.settings or {}, info.options.get("validate_limits")
+    )
+    offload = None
+    pool = info.registry.queryUtility(IOffloadPool)
+    if pool is not None and _flag(info, "validate_offload", "offload"):
+
+        def decode_and_load(body):
+            return load(backend.loads(body))
 
-    def wrapped(context, request):
+        offload = pool.wrap(decode_and_load)
+        threshold = int(
+            (info.settings or {}).get(
+                "marshmallow.offload_threshold", DEFAULT_THRESHOLD
+            )
+        )
+
+    def validate(request):
         if request.method == "GET":
-            data = dict()
-            for k, v in request.GET.items():
-                field = schema.fields.get(k)
-                if isinstance(field, fields.List):
-                    data.setdefault(k, []).append(v)
-                else:
-                    data[k] = v
+            query = request.GET
+            data = dict(query.items())
+            data.pop(ignored, None)
+            for key in list_keys:
+                if key in data:
+                    data[key] = query.getall(key)
+            return load(data)
+        if limits is not None:
+            check_body(request, limits, scan=not stream)
+        if stream:
+            return _load_stream(schema, load, request.body_file)
+        elif (
+            offload is not None and (request.content_length or 0) >= threshold
+        ):
+            return offload(request.body)
         else:
-            data = request.json_body
-        request.data = schema.load(data)
-        return view(context, request)
+            return load(backend.load_body(request))
+
+    sink = info.registry.queryUtility(IMetricsSink)
+    if sink is not None:
+        validate = measure_load(validate, sink, view_name(info))
+
+    if asbool(info.options.get("validate_lazy")):
+
+        def wrapped(context, request):
+            request.set_property(validate, "data", reify=True)
+            return view(context, request)
+
+    else:
+
+        def wrapped(context, request):
+            request.data = validate(request)
+            return view(context, request)
 
     return wrapped
 
 
-view_validator.options = ("validate",)
+view_validator.options = (
+    "validate",
+    "validate_compiled",
+    "validate_stream",
+    "validate_lazy",
+    "validate_offload",
+    "validate_limits",
+    "validate_max_errors",
+)
+
+
+def _list_keys(schema):
+    """
+    Return the query string parameters which are loaded into list fields, and
+    so may be repeated.
+
+    """
+    return [
+        field.data_key or name
+        for name, field in schema.load_fields.items()
+        if isinstance(field, fields.List)
+    ]
+
+
+def _load_stream(schema, load, fh):
+    """
+    Parse a JSON array from the file handle and load each item as it is
+    decoded.  Validation errors are raised when the offending item is reached.
+
+    """
+    items = enumerate(iter_json_array_items(fh))
+    while True:
+        try:
+            index, item = next(items)
+        except StopIteration:
+            return
+        except TypeError:
+            raise ValidationError({"_schema": [schema.error_messages["type"]]})
+        try:
+            yield load(item, many=False)
+        except ValidationError as err:
+            if schema.opts.index_errors:
+                raise ValidationError({index: err.messages}, data=item)
+            raise
 
 
 def view_marshaller(view, info):
-    schema = process_schema(info.options.get("marshal"))
+    if is_coroutine_view(info):
+        view = awaiting_view(view, info.registry)
+    schema = process_schema(info.options.get("marshal"), info.registry)
     if schema is None:
         return view
+    compiled = _flag(info, "marshal_compiled", "compile")
 
-    def wrapped(context, request):
-        output = view(context, request)
-        if isinstance(output, Response):
-            return output
-        else:
-            return schema.dump(output)
+    def make_dump(schema):
+        return compile_dumper(schema) if compiled else schema.dump
+
+    dump = make_dump(schema)
+    stream = asbool(info.options.get("marshal_stream"))
+    pool = info.registry.queryUtility(IOffloadPool)
+    if (
+        pool is not None
+        and schema.many
+        and not stream
+        and _flag(info, "marshal_offload", "offload")
+    ):
+        min_items = int(
+            (info.settings or {}).get(
+                "marshmallow.offload_items", DEFAULT_ITEMS
+            )
+        )
+        dump = offload_collections(dump, pool.wrap(dump), min_items)
+
+    if stream:
+        dumps = settings_backend(info.settings).dumps
+
+        def serialize(output, dump=dump):
+            def dump_item(item):
+                return dump(item, many=False)
+
+            if hasattr(output, "__aiter__"):
+                output = iter_async(output, info.registry)
+
+            return Response(
+                app_iter=iter_json_array(output, dump_item, dumps=dumps),
+                content_type="application/json",
+                charset="utf-8",
+            )
+
+    else:
+
+        def serialize(output, dump=dump):
+            return dump(output)
+
+    sink = info.registry.queryUtility(IMetricsSink)
+    if sink is not None:
+        serialize = measure_dump(serialize, sink, view_name(info))
+
+    if asbool(info.options.get("marshal_fields")):
+        projection = functools.lru_cache(PROJECTION_CACHE_SIZE)(
+            functools.partial(_projection, schema)
+        )
+
+        @functools.lru_cache(PROJECTION_CACHE_SIZE)
+        def projected_dump(only):
+            return make_dump(_project(schema, only))
+
+        def wrapped(context, request):
+            # Reject unknown fields before the view makes any changes.
+            value = request.GET.get(FIELDS_PARAM)
+            only = projection(value) if value else None
+            output = view(context, request)
+            if isinstance(output, Response):
+                return output
+            if only is None:
+                return serialize(output)
+            return serialize(output, projected_dump(only))
+
+    else:
+
+        def wrapped(context, request):
+            output = view(context, request)
+            if isinstance(output, Response):
+                return output
+            else:
+                return serialize(output)
 
     return wrapped
 
 
-view_marshaller.options = ("marshal",)
+view_marshaller.options = (
+    "marshal",
+    "marshal_compiled",
+    "marshal_stream",
+    "marshal_fields",
+    "marshal_offload",
+)
+
+# The query parameter selecting fields with `marshal_fields`.
+FIELDS_PARAM = "fields"
+
+# The number of projections to cache per view.
+PROJECTION_CACHE_SIZE = 128
+
+
+def _projection(schema, value):
+    """
+    Parse a comma-separated list of fields, such as ``id,name,owner.id``,
+    into a tuple of field names suitable for a schema's `only` argument.
+    Fields are given by their `data_key` and may reference nested fields with
+    a dot.  Raises a :class:`ValidationError` for unknown fields.
+
+    """
+    names = set()
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        path = []
+        current = schema
+        for part in item.split("."):
+            if current is None:
+                raise ValidationError(
+                    {FIELDS_PARAM: [f"Unknown field {item}."]}
+                )
+            by_key = {
+                field.data_key or name: name
+                for name, field in current.dump_fields.items()
+            }
+            if part not in by_key:
+                raise ValidationError(
+                    {FIELDS_PARAM: [f"Unknown field {item}."]}
+                )
+            path.append(by_key[part])
+            field = current.dump_fields[by_key[part]]
+            if isinstance(field, fields.List):
+                field = field.inner
+            current = (
+                field.schema if isinstance(field, fields.Nested) else None
+            )
+        names.add(".".join(path))
+    return tuple(sorted(names))
+
+
+def _project(schema, only):
+    """
+    Create a copy of the schema, restricted to the given fields, or to the
+    schema's own fields if `only` is ``None``.
+
+    Marshmallow pushes dotted `only` and `exclude` names down to the nested
+    fields, so they're recovered from there, to keep hiding whatever the
+    schema hides.
+
+    """
+    declared = schema.declared_fields
+    exclude = set(schema.exclude)
+    for name, field in declared.items():
+        nested = getattr(field, "exclude", None) or ()
+        exclude.update(f"{name}.{x}" for x in nested)
+    if schema.only is not None:
+        original = set(schema.only)
+        for name in schema.only:
+            nested = getattr(declared[name], "only", None) or ()
+            original.update(f"{name}.{x}" for x in nested)
+        if only is not None:
+            original = _flatten(_intersect(_tree(only), _tree(original)))
+        only = tuple(sorted(original))
+    kwargs = dict(
+        only=only,
+        exclude=tuple(sorted(exclude)),
+        many=schema.many,
+        load_only=schema.load_only,
+        dump_only=schema.dump_only,
+        partial=schema.partial,
+        unknown=schema.unknown,
+    )
+    if schema.context:
+        kwargs["context"] = schema.context
+    return type(schema)(**kwargs)
+
+
+def _tree(names):
+    """
+    Turn dotted field names into a tree, mapping each name to the tree of
+    its nested fields, or to ``None`` for all of them.
+
+    """
+    nested = dict()
+    for name in names:
+        head, _, rest = name.partition(".")
+        nested.setdefault(head, None)
+        if rest:
+            nested[head] = (nested[head] or []) + [rest]
+    return {
+        name: None if rest is None else _tree(rest)
+        for name, rest in nested.items()
+    }
+
+
+def _intersect(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return {name: _intersect(a[name], b[name]) for name in a.keys() & b.keys()}
+
+
+def _flatten(tree):
+    for name, nested in tree.items():
+        if nested is None:
+            yield name
+        else:
+            # An empty tree leaves the field out.
+            yield from (f"{name}.{x}" for x in _flatten(nested))
 
 
 def view_api_spec(view, info):
@@ -0,0 +1,103 @@
+import asyncio
+import inspect
+import threading
+
+from zope.interface import Interface
+
+
+class IEventLoop(Interface):
+    """
+    Marker interface for the event loop that coroutine views are run on.
+
+    """
+
+
+def set_event_loop(registry, loop):
+    """
+    Run coroutine views on the given event loop, typically the loop of the
+    ASGI server the application is running under.  Call once the loop is
+    running, for example from the server's startup hook.
+
+    """
+    registry.registerUtility(loop, IEventLoop)
+
+
+def is_coroutine_view(info):
+    """
+    Return whether the view being derived is an ``async def`` function, or a
+    class with an ``async def`` method as its view.
+
+    """
+    view = getattr(info, "original_view", None)
+    if inspect.isclass(view):
+        view = getattr(view, info.options.get("attr") or "__call__", None)
+    return inspect.iscoroutinefunction(view) or inspect.iscoroutinefunction(
+        getattr(view, "__call__", None)
+    )
+
+
+_local = threading.local()
+
+
+async def _await(awaitable):
+    return await awaitable
+
+
+def run_awaitable(awaitable, registry):
+    """
+    Wait for the result of the awaitable from a synchronous view.
+
+    If an event loop is registered with :func:`set_event_loop`, the awaitable
+    is run on it and the calling thread blocks until it is done.  Otherwise it
+    is run on an event loop private to the calling thread.  Validation and
+    marshalling stay in the calling thread, except with `validate_lazy` or
+    `validate_stream`, where the request data is loaded when the coroutine
+    reads it, and so on the event loop.
+
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None:
+        raise RuntimeError(
+            "Cannot wait for a coroutine view from the thread running the "
+            "event loop.  Run the application in a worker thread."
+        )
+    loop = registry.queryUtility(IEventLoop)
+    if loop is not None and loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(_await(awaitable), loop)
+        return future.result()
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _local.loop = asyncio.new_event_loop()
+    return loop.run_until_complete(_await(awaitable))
+
+
+def iter_async(iterable, registry):
+    """
+    Iterate over an asynchronous iterable from synchronous code, waiting for
+    each item with :func:`run_awaitable`.
+
+    """
+    iterator = iterable.__aiter__()
+    while True:
+        try:
+            yield run_awaitable(iterator.__anext__(), registry)
+        except StopAsyncIteration:
+            return
+
+
+def awaiting_view(view, registry):
+    """
+    Wrap a view so that awaitable results are waited for.
+
+    """
+
+    def wrapped(context, request):
+        output = view(context, request)
+        if inspect.isawaitable(output):
+            output = run_awaitable(output, registry)
+        return output
+
+    return wrapped
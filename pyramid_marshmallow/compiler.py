@@ -0,0 +1,346 @@
+from collections.abc import Mapping
+
+from marshmallow import EXCLUDE, RAISE, Schema, ValidationError, fields
+from marshmallow.exceptions import RegistryError
+from marshmallow.utils import get_value, is_collection, missing, set_value
+
+# Fields whose deserialization is a no-op when the incoming value is already of
+# the given type and no validators are attached.
+INLINE_LOAD_TYPES = {
+    fields.String: str,
+    fields.Integer: int,
+    fields.Boolean: bool,
+}
+
+
+class _Fallback(Exception):
+    """
+    Raised when the fast path can't produce a result and `Schema.load` should
+    take over.
+
+    """
+
+
+def _overrides(schema, *names):
+    """
+    Return true if the schema's class overrides any of the given `Schema`
+    methods.
+
+    """
+    cls = type(schema)
+    return any(getattr(cls, x) is not getattr(Schema, x) for x in names)
+
+
+def _custom_booleans(field):
+    """
+    Return true if a `Boolean` field has its own truthy or falsy values, in
+    which case even a `bool` may be invalid.
+
+    """
+    return isinstance(field, fields.Boolean) and (
+        field.truthy != fields.Boolean.truthy
+        or field.falsy != fields.Boolean.falsy
+    )
+
+
+def _has_hooks(schema):
+    return any(schema._hooks.values())
+
+
+def compile_loader(schema, fallback=None):
+    """
+    Analyze a schema and return a function equivalent to ``schema.load``.
+
+    The returned function binds each field's deserializer up front, skipping
+    Marshmallow's per-call bookkeeping, and skips deserialization entirely for
+    simple fields whose input is already the right type.  If anything goes
+    wrong it defers to `fallback`, ``schema.load`` by default, so results and
+    errors are identical.
+
+    If the schema uses features the fast path doesn't support (processors,
+    validators, partial loading, overridden load methods), `fallback` is
+    returned as-is.
+
+    """
+    if fallback is None:
+        fallback = schema.load
+    if (
+        _has_hooks(schema)
+        or schema.partial
+        or _overrides(schema, "load", "_do_load", "_deserialize")
+    ):
+        return fallback
+
+    plan = []
+    for attr_name, field in schema.load_fields.items():
+        data_key = field.data_key if field.data_key is not None else attr_name
+        key = field.attribute or attr_name
+        inline = INLINE_LOAD_TYPES.get(type(field))
+        if field.validators or _custom_booleans(field):
+            inline = None
+        plan.append((data_key, key, "." in key, field.deserialize, inline))
+    known = frozenset(data_key for data_key, *_ in plan)
+    unknown = schema.unknown
+    dict_class = schema.dict_class
+
+    def load_one(data):
+        if not isinstance(data, Mapping):
+            raise _Fallback()
+        result = dict_class()
+        for data_key, key, dotted, deserialize, inline in plan:
+            value = data.get(data_key, missing)
+            if inline is None or type(value) is not inline:
+                value = deserialize(value, data_key, data)
+                if value is missing:
+                    continue
+            if dotted:
+                set_value(result, key, value)
+            else:
+                result[key] = value
+        if unknown != EXCLUDE:
+            extra = data.keys() - known
+            if extra and unknown == RAISE:
+                raise _Fallback()
+            for key in extra:
+                result[key] = data[key]
+        return result
+
+    def load(data, *, many=None):
+        many = schema.many if many is None else bool(many)
+        try:
+            if many:
+                if not is_collection(data):
+                    raise _Fallback()
+                return [load_one(item) for item in data]
+            return load_one(data)
+        except (_Fallback, ValidationError):
+            return fallback(data, many=many)
+
+    return load
+
+
+# Fields whose serialization is a no-op when the outgoing value is already of
+# the given type.  `Raw` fields never transform their value.
+INLINE_DUMP_TYPES = {
+    fields.String: str,
+    fields.Integer: int,
+    fields.Float: float,
+    fields.Boolean: bool,
+    fields.Raw: object,
+}
+
+
+def _key_getter(key):
+    """
+    Return a function equivalent to ``marshmallow.utils.get_value`` for a
+    single, undotted key.
+
+    """
+
+    def get(obj):
+        if type(obj) is dict:
+            value = obj.get(key, missing)
+            if value is missing:
+                value = getattr(obj, key, missing)
+            return value
+        return get_value(obj, key, missing)
+
+    return get
+
+
+def _per_item(serialize):
+    """
+    Return a column serializer calling `serialize` for each value.
+
+    """
+
+    def column(values, objs):
+        return [
+            value if value is missing else serialize(value, obj)
+            for value, obj in zip(values, objs)
+        ]
+
+    return column
+
+
+def _schema_key(schema):
+    """
+    Identify schemas which dump the same way, to detect recursion.
+
+    """
+    only = None if schema.only is None else frozenset(schema.only)
+    return (type(schema), only, frozenset(schema.exclude))
+
+
+def _compile_field_dump(attr_name, field, compiling):
+    """
+    Return a ``(getter, serializer, column)`` tuple for the field, or ``None``
+    if the field must go through ``Field.serialize``.  ``column`` serializes
+    a list of values at once, leaving ``missing`` values in place.
+
+    """
+    cls = type(field)
+    if (
+        not field._CHECK_ATTRIBUTE
+        or cls.serialize is not fields.Field.serialize
+        or cls.get_value is not fields.Field.get_value
+    ):
+        return None
+    check_key = attr_name if field.attribute is None else field.attribute
+    if "." in check_key:
+        return None
+    getter = _key_getter(check_key)
+
+    inline = INLINE_DUMP_TYPES.get(cls)
+    if getattr(field, "as_string", False):
+        inline = None
+    if inline is object:
+        return getter, None, None
+    if cls is fields.Nested:
+        try:
+            nested = field.schema
+        except RegistryError:
+            return None
+        if _schema_key(nested) in compiling:
+            # A recursive schema, which is usually a new instance each level.
+            return None
+        nested_dump = compile_dumper(nested, _compiling=compiling)
+        many = nested.many or field.many
+
+        def serialize(value, obj):
+            if value is None:
+                return None
+            return nested_dump(value, many=many)
+
+        if not getattr(nested_dump, "compiled", False):
+            # Processors may depend on seeing each list separately.
+            return getter, serialize, _per_item(serialize)
+
+        def column(values, objs):
+            # Dump the nested objects of every item in one batch.
+            present = [
+                i
+                for i, value in enumerate(values)
+                if value is not missing and value is not None
+            ]
+            if many:
+                batches = [list(values[i]) for i in present]
+                flat = [item for batch in batches for item in batch]
+            else:
+                flat = [values[i] for i in present]
+            dumped = nested_dump(flat, many=True)
+            result = [value if value is missing else None for value in values]
+            if many:
+                start = 0
+                for i, batch in zip(present, batches):
+                    result[i] = dumped[start : start + len(batch)]
+                    start += len(batch)
+            else:
+                for i, value in zip(present, dumped):
+                    result[i] = value
+            return result
+
+        return getter, serialize, column
+
+    field_serialize = field._serialize
+
+    if inline is None:
+
+        def serialize(value, obj):
+            return field_serialize(value, attr_name, obj)
+
+        column = _per_item(serialize)
+
+    else:
+
+        def serialize(value, obj):
+            if type(value) is inline:
+                return value
+            return field_serialize(value, attr_name, obj)
+
+        def column(values, objs):
+            return [
+                value
+                if type(value) is inline or value is missing
+                else field_serialize(value, attr_name, obj)
+                for value, obj in zip(values, objs)
+            ]
+
+    return getter, serialize, column
+
+
+def compile_dumper(schema, _compiling=None):
+    """
+    Analyze a schema and return a function equivalent to ``schema.dump``.
+
+    Attribute getters and ``data_key`` mapping are resolved once, fields whose
+    serialization would be a no-op are skipped, and ``Nested`` schemas are
+    compiled as well.  Fields with custom accessors fall back to
+    ``Field.serialize``.
+
+    Collections are dumped a column at a time:  Each field's value is read
+    from every item, then serialized, before moving on to the next field.
+    Nested objects are gathered from all the items and dumped in one batch.
+
+    If the schema uses features the fast path doesn't support (processors or
+    overridden dump methods), ``schema.dump`` is returned as-is.
+
+    """
+    if _has_hooks(schema) or _overrides(
+        schema, "dump", "_serialize", "get_attribute"
+    ):
+        return schema.dump
+
+    compiling = set(_compiling or ())
+    compiling.add(_schema_key(schema))
+    plan = []
+    for attr_name, field in schema.dump_fields.items():
+        key = field.data_key if field.data_key is not None else attr_name
+        compiled = _compile_field_dump(attr_name, field, compiling)
+        getter, serialize, column = compiled or (None, None, None)
+        plan.append((key, attr_name, field, getter, serialize, column))
+    dict_class = schema.dict_class
+    get_attribute = schema.get_attribute
+
+    def dump_one(obj):
+        result = dict_class()
+        for key, attr_name, field, getter, serialize, _ in plan:
+            value = missing if getter is None else getter(obj)
+            if value is missing:
+                # Custom accessors and `dump_default` are left to the field.
+                value = field.serialize(attr_name, obj, accessor=get_attribute)
+                if value is missing:
+                    continue
+            elif serialize is not None:
+                value = serialize(value, obj)
+            result[key] = value
+        return result
+
+    def dump_many(objs):
+        objs = list(objs)
+        rows = [dict_class() for _ in objs]
+        for key, attr_name, field, getter, _, column in plan:
+            if getter is None:
+                values = [missing] * len(objs)
+            else:
+                values = [getter(obj) for obj in objs]
+                if column is not None:
+                    values = column(values, objs)
+            for row, obj, value in zip(rows, objs, values):
+                if value is missing:
+                    value = field.serialize(
+                        attr_name, obj, accessor=get_attribute
+                    )
+                    if value is missing:
+                        continue
+                row[key] = value
+        return rows
+
+    def dump(obj, *, many=None):
+        many = schema.many if many is None else bool(many)
+        if many and obj is not None:
+            return dump_many(obj)
+        return dump_one(obj)
+
+    dump.compiled = True
+    return dump
@@ -0,0 +1,171 @@
+import contextvars
+
+from marshmallow import Schema, ValidationError, fields, missing
+from marshmallow.utils import is_collection
+
+# The error budget of the load in progress, or `None`.
+_budget = contextvars.ContextVar("pyramid_marshmallow_budget", default=None)
+
+
+class _Budget:
+    __slots__ = ("remaining", "exhausted")
+
+    def __init__(self, max_errors):
+        self.remaining = max_errors
+        self.exhausted = False
+
+
+class _Abort(ValidationError):
+    """
+    Raised when the error budget is exhausted.  A subclass of
+    `ValidationError`, so that `Nested` and `List` fields record the errors
+    collected so far under the right key and index on the way up.
+
+    """
+
+
+def _count(messages):
+    """
+    Count the errors in a message structure, counting each field once.
+
+    """
+    if isinstance(messages, dict):
+        return sum(_count(value) for value in messages.values())
+    return 1
+
+
+def _prune(messages):
+    """
+    Remove the empty messages left by items skipped once aborted.
+
+    """
+    if not isinstance(messages, dict):
+        return messages
+    pruned = {}
+    for key, value in messages.items():
+        value = _prune(value)
+        if value != {}:
+            pruned[key] = value
+    return pruned
+
+
+def _call_and_store(getter_func, data, *, field_name, error_store, index=None):
+    """
+    A replacement for `Schema._call_and_store` which stops loading once the
+    error budget is exhausted.  Behaves identically when no budget is set.
+
+    """
+    budget = _budget.get()
+    if budget is None:
+        return Schema._call_and_store(
+            getter_func,
+            data,
+            field_name=field_name,
+            error_store=error_store,
+            index=index,
+        )
+    if budget.exhausted:
+        raise _Abort({})
+    remaining = budget.remaining
+    try:
+        return getter_func(data)
+    except ValidationError as error:
+        error_store.store_error(error.messages, field_name, index=index)
+        if not budget.exhausted:
+            # Errors from nested schemas have already been counted.
+            if budget.remaining == remaining:
+                budget.remaining -= _count(error.messages)
+            budget.exhausted = budget.remaining <= 0
+        if budget.exhausted:
+            raise _Abort(error_store.errors)
+        return error.valid_data or missing
+
+
+def _install(schema, seen=frozenset()):
+    """
+    Install the replacement `_call_and_store` on the schema and every schema
+    nested within it.  Recursive schemas are only handled to the first level
+    of recursion, deeper levels collect all their errors.
+
+    """
+    if type(schema) in seen:
+        return
+    seen = seen | {type(schema)}
+    schema._call_and_store = _call_and_store
+    for field in schema.load_fields.values():
+        _install_field(field, seen)
+
+
+def _install_field(field, seen):
+    if isinstance(field, fields.Nested):
+        _install(field.schema, seen)
+    elif isinstance(field, fields.List):
+        if not isinstance(field.inner, fields.Nested) or field.inner.many:
+            # `List` loads a list of schemas with `many=True`, and other
+            # lists item by item.
+            field._deserialize = _list_deserializer(field)
+        _install_field(field.inner, seen)
+    elif isinstance(field, fields.Tuple):
+        for inner in field.tuple_fields:
+            _install_field(inner, seen)
+    elif isinstance(field, fields.Dict) and field.value_field is not None:
+        _install_field(field.value_field, seen)
+
+
+def _list_deserializer(field):
+    """
+    Return a replacement for `List._deserialize`, which counts the errors of
+    each item and stops once the error budget is exhausted.
+
+    """
+    original = field._deserialize
+    inner = field.inner
+
+    def deserialize(value, attr, data, **kwargs):
+        budget = _budget.get()
+        if budget is None or not is_collection(value):
+            return original(value, attr, data, **kwargs)
+        result = []
+        errors = {}
+        for idx, each in enumerate(value):
+            remaining = budget.remaining
+            try:
+                result.append(inner.deserialize(each, **kwargs))
+            except ValidationError as error:
+                if error.valid_data is not None:
+                    result.append(error.valid_data)
+                errors[idx] = error.messages
+                if budget.remaining == remaining:
+                    budget.remaining -= _count(error.messages)
+                    budget.exhausted = budget.remaining <= 0
+                if budget.exhausted:
+                    break
+        if errors:
+            raise ValidationError(errors, valid_data=result)
+        return result
+
+    return deserialize
+
+
+def fail_fast_loader(schema, max_errors):
+    """
+    Return a function equivalent to ``schema.load``, which stops once
+    `max_errors` field errors have been found, raising a `ValidationError`
+    with the errors found so far.  Remaining fields and items, including
+    those of nested schemas, are skipped, as are schema validators.
+
+    The schema and its nested schemas are modified, so should not be shared.
+
+    """
+    _install(schema)
+
+    def load(data, *, many=None):
+        token = _budget.set(_Budget(max_errors))
+        try:
+            return schema.load(data, many=many)
+        except _Abort as err:
+            raise ValidationError(_prune(err.messages), data=data)
+        finally:
+            _budget.reset(token)
+
+    return load
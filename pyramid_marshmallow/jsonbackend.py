@@ -0,0 +1,159 @@
+import functools
+import json
+
+
+class StdlibBackend:
+    """
+    JSON backend using the standard library's `json` module.
+
+    """
+
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj, indent=False, sort_keys=False):
+        return json.dumps(
+            obj,
+            indent=2 if indent else None,
+            sort_keys=sort_keys,
+        ).encode("utf-8")
+
+    def load_body(self, request):
+        return request.json_body
+
+
+class OrjsonBackend(StdlibBackend):
+    """
+    JSON backend using `orjson <https://github.com/ijl/orjson>`_.
+
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self.orjson = orjson
+
+    def loads(self, data):
+        return self.orjson.loads(data)
+
+    def dumps(self, obj, indent=False, sort_keys=False):
+        # Like `json`, accept non-string keys, such as integer response codes
+        # in merge files.
+        option = self.orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= self.orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= self.orjson.OPT_SORT_KEYS
+        return self.orjson.dumps(obj, option=option)
+
+    def load_body(self, request):
+        return self.loads(request.body)
+
+
+class MsgspecBackend(StdlibBackend):
+    """
+    JSON backend using `msgspec <https://jcristharif.com/msgspec/>`_.
+
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self.msgspec = msgspec
+
+    def loads(self, data):
+        try:
+            return self.msgspec.json.decode(data)
+        except self.msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+    def dumps(self, obj, indent=False, sort_keys=False):
+        body = self.msgspec.json.encode(
+            obj,
+            order="sorted" if sort_keys else None,
+        )
+        if indent:
+            body = self.msgspec.json.format(body, indent=2)
+        return body
+
+    def load_body(self, request):
+        return self.loads(request.body)
+
+
+BACKENDS = {
+    "json": StdlibBackend,
+    "orjson": OrjsonBackend,
+    "msgspec": MsgspecBackend,
+}
+
+# Order of preference for `auto`.
+AUTO = ("orjson", "msgspec", "json")
+
+
+def get_backend(name=None):
+    """
+    Return the JSON backend of the given name, one of "json", "orjson",
+    "msgspec" or "auto".  "auto" selects the fastest backend installed.
+    Defaults to "json".
+
+    """
+    return _get_backend((name or "json").strip())
+
+
+@functools.lru_cache(maxsize=None)
+def _get_backend(name):
+    if name == "auto":
+        for candidate in AUTO:
+            try:
+                return BACKENDS[candidate]()
+            except ImportError:
+                continue
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown JSON backend {name!r}.  Must be one of "
+            + ", ".join(repr(x) for x in (*BACKENDS, "auto"))
+            + "."
+        )
+    try:
+        return backend()
+    except ImportError:
+        raise ImportError(
+            f"You must have the `{name}` package installed to use it as the "
+            "JSON backend."
+        )
+
+
+def settings_backend(settings):
+    """
+    Return the JSON backend configured with the `marshmallow.json_backend`
+    setting.
+
+    """
+    return get_backend((settings or {}).get("marshmallow.json_backend"))
+
+
+def json_renderer_factory(info):
+    """
+    A renderer serializing the value with the configured JSON backend.
+    Registered as ``marshmallow_json``.
+
+    """
+    backend = settings_backend(info.settings)
+
+    def render(value, system):
+        request = system.get("request")
+        if request is not None:
+            response = request.response
+            if response.content_type == response.default_content_type:
+                response.content_type = "application/json"
+        return backend.dumps(value)
+
+    return render
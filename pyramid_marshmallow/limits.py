@@ -0,0 +1,301 @@
+import re
+from collections import namedtuple
+
+from marshmallow import RAISE, Schema, ValidationError, fields, validate
+from pyramid.exceptions import ConfigurationError
+from pyramid.settings import asbool
+
+Limits = namedtuple(
+    "Limits",
+    [
+        "max_bytes",  # The size of the request body.
+        "max_depth",  # How deeply arrays and objects may be nested.
+        "max_length",  # The number of items in an array.
+        "max_keys",  # The number of keys in an object.
+    ],
+)
+
+NO_LIMITS = Limits(None, None, None, None)
+
+SETTINGS = {
+    "max_bytes": "marshmallow.max_body_bytes",
+    "max_depth": "marshmallow.max_depth",
+    "max_length": "marshmallow.max_array_length",
+    "max_keys": "marshmallow.max_keys",
+}
+
+
+class LimitExceeded(ValidationError):
+    """
+    Raised when a request body exceeds the limits configured for the view,
+    before it is decoded.
+
+    """
+
+
+# Fields loading JSON scalars.
+SCALAR_FIELDS = (
+    fields.String,
+    fields.Number,
+    fields.Boolean,
+    fields.DateTime,
+    fields.TimeDelta,
+    fields.Enum,
+    fields.IP,
+    fields.IPInterface,
+)
+
+
+def view_limits(schema, settings, option=None):
+    """
+    Determine the limits for a view from its `validate_limits` option, the
+    `marshmallow.max_*` settings and, if the `derive` key of the option or
+    the `marshmallow.derive_limits` setting is enabled, the structure of the
+    schema.  Returns `None` if nothing is limited.
+
+    """
+    option = dict(option or {})
+    derive = option.pop("derive", settings.get("marshmallow.derive_limits"))
+    unknown = set(option) - set(Limits._fields)
+    if unknown:
+        raise ConfigurationError(
+            "Unknown limits " + ", ".join(repr(x) for x in sorted(unknown))
+        )
+    derived = schema_limits(schema) if asbool(derive) else NO_LIMITS
+    values = dict()
+    for name, setting in SETTINGS.items():
+        value = option.get(name, settings.get(setting))
+        if value is None:
+            value = getattr(derived, name)
+        values[name] = None if value is None else int(value)
+    limits = Limits(**values)
+    return None if limits == NO_LIMITS else limits
+
+
+def schema_limits(schema):
+    """
+    Derive the limits on nesting depth, array length and object keys that a
+    body can have while still being valid for the schema.  Limits which
+    can't be determined, such as the length of arrays without a `Length`
+    validator, are `None`.
+
+    """
+    state = {"length": 0, "keys": 0, "unbounded": set()}
+    depth = _schema_depth(schema, state, set())
+    if schema.many:
+        state["unbounded"].add("length")
+        depth += 1
+    unbounded = state["unbounded"]
+    return Limits(
+        max_bytes=None,
+        max_depth=None if "depth" in unbounded else depth,
+        # A schema without arrays or keys rejects them when loading, so
+        # there's nothing to limit.  A limit of 0 would reject `[]` and `{}`.
+        max_length=None if "length" in unbounded else state["length"] or None,
+        max_keys=None if "keys" in unbounded else state["keys"] or None,
+    )
+
+
+def _schema_depth(schema, state, seen):
+    if type(schema) in seen:
+        # Recursive schemas may nest arbitrarily deeply.
+        state["unbounded"].add("depth")
+        return 1
+    seen = seen | {type(schema)}
+    load_fields = schema.load_fields
+    if schema.unknown == RAISE:
+        state["keys"] = max(state["keys"], len(load_fields))
+    else:
+        # Unknown keys may hold any value.
+        state["unbounded"].update(("depth", "length", "keys"))
+    depth = 0
+    for field in load_fields.values():
+        depth = max(depth, _field_depth(field, state, seen))
+    return depth + 1
+
+
+def _field_depth(field, state, seen):
+    if isinstance(field, fields.Pluck):
+        plucked = field.schema.fields.get(field.field_name)
+        depth = 0 if plucked is None else _field_depth(plucked, state, seen)
+        if plucked is None:
+            state["unbounded"].update(("depth", "length", "keys"))
+        if field.many:
+            _array_length(field, state)
+            depth += 1
+        return depth
+    elif isinstance(field, fields.Nested):
+        schema = field.schema
+        if not isinstance(schema, Schema):
+            state["unbounded"].update(("depth", "length", "keys"))
+            return 0
+        depth = _schema_depth(schema, state, seen)
+        if field.many:
+            _array_length(field, state)
+            depth += 1
+        return depth
+    elif isinstance(field, fields.List):
+        _array_length(field, state)
+        return _field_depth(field.inner, state, seen) + 1
+    elif isinstance(field, fields.Tuple):
+        state["length"] = max(state["length"], len(field.tuple_fields))
+        return 1 + max(
+            (_field_depth(inner, state, seen) for inner in field.tuple_fields),
+            default=0,
+        )
+    elif isinstance(field, fields.Dict):
+        state["unbounded"].add("keys")
+        if field.value_field is None:
+            state["unbounded"].update(("depth", "length"))
+            return 1
+        return _field_depth(field.value_field, state, seen) + 1
+    elif _is_scalar(field):
+        return 0
+    else:
+        # `Raw`, `Function` and custom fields may load arbitrary JSON.
+        state["unbounded"].update(("depth", "length", "keys"))
+        return 0
+
+
+def _is_scalar(field):
+    """
+    Return true if the field only loads JSON scalars, which is the case for
+    the built-in scalar fields, and subclasses that load the same way.
+
+    """
+    cls = type(field)
+    return isinstance(field, SCALAR_FIELDS) and all(
+        getattr(cls, name).__module__ == fields.__name__
+        for name in ("deserialize", "_deserialize")
+    )
+
+
+def _array_length(field, state):
+    maximum = None
+    for validator in field.validators:
+        if not isinstance(validator, validate.Length):
+            continue
+        bound = validator.equal if validator.max is None else validator.max
+        if bound is not None and (maximum is None or bound < maximum):
+            maximum = bound
+    if maximum is None:
+        state["unbounded"].add("length")
+    else:
+        state["length"] = max(state["length"], maximum)
+
+
+# Strings, which may contain brackets and commas.
+STRINGS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+
+# All bytes but the structural characters of JSON, with and without quotes.
+NOT_STRUCTURAL = bytes(c for c in range(256) if c not in b"[]{},")
+NOT_STRUCTURAL_OR_QUOTE = bytes(c for c in range(256) if c not in b'"[]{},')
+
+# Arrays and objects containing no other arrays or objects, once everything
+# but structural characters has been removed.
+INNERMOST = re.compile(rb"\[,*\]|\{,*\}")
+
+# The number of levels stripped with `INNERMOST` before scanning the rest.
+STRIP_LEVELS = 8
+
+OPEN_ARRAY, OPEN_OBJECT, COMMA = b"[{,"
+
+
+def check_body(request, limits, scan=True):
+    """
+    Check the request body against the limits before it is decoded, raising
+    :class:`LimitExceeded` if exceeded.  The size is checked against the
+    `Content-Length` header before the body is read.  If `scan` is false, the
+    body isn't read and only the `Content-Length` header is checked.
+
+    """
+    if limits.max_bytes is not None:
+        size = request.content_length
+        if size is None and scan:
+            size = len(request.body)
+        if size is not None and size > limits.max_bytes:
+            _exceeded(f"Request body exceeds {limits.max_bytes} bytes.")
+    if scan and limits[1:] != NO_LIMITS[1:]:
+        check_structure(request.body, limits)
+
+
+def check_structure(body, limits):
+    """
+    Scan a JSON document, raising :class:`LimitExceeded` if it is nested too
+    deeply or has too many items in an array or keys in an object.  The
+    document isn't decoded or validated.
+
+    """
+    structure = _structure(body)
+    long_array = many_keys = None
+    if limits.max_length is not None:
+        long_array = re.compile(rb"\[,{%d,}\]" % limits.max_length)
+    if limits.max_keys is not None:
+        many_keys = re.compile(rb"\{,{%d,}\}" % limits.max_keys)
+    # Strip the innermost arrays and objects one level at a time, so the
+    # bulk of the work is done by the regular expression engine rather than
+    # a loop over each character.  Each pass is linear in the size of the
+    # body, so the number of passes is capped.
+    stripped = 0
+    while stripped < STRIP_LEVELS:
+        if long_array is not None and long_array.search(structure):
+            _exceeded(f"Array exceeds {limits.max_length} items.")
+        if many_keys is not None and many_keys.search(structure):
+            _exceeded(f"Object exceeds {limits.max_keys} keys.")
+        structure, count = INNERMOST.subn(b"", structure)
+        if not count:
+            return
+        stripped += 1
+        if limits.max_depth is not None and stripped > limits.max_depth:
+            _exceeded(f"Nesting exceeds a depth of {limits.max_depth}.")
+    _scan(structure, limits, stripped)
+
+
+def _scan(structure, limits, stripped):
+    """
+    Check what is left of a deeply nested document in a single pass.  Every
+    container left had more than `stripped` levels beneath it removed.
+
+    """
+    max_depth = limits.max_depth
+    max_length = limits.max_length
+    max_keys = limits.max_keys
+    # Whether each open container is an array, and its number of commas.
+    arrays = []
+    commas = []
+    for char in structure:
+        if char == COMMA:
+            if not commas:
+                continue
+            count = commas[-1] = commas[-1] + 1
+            if arrays[-1]:
+                if max_length is not None and count >= max_length:
+                    _exceeded(f"Array exceeds {max_length} items.")
+            elif max_keys is not None and count >= max_keys:
+                _exceeded(f"Object exceeds {max_keys} keys.")
+        elif char == OPEN_ARRAY or char == OPEN_OBJECT:
+            arrays.append(char == OPEN_ARRAY)
+            commas.append(0)
+            if max_depth is not None and len(arrays) + stripped > max_depth:
+                _exceeded(f"Nesting exceeds a depth of {max_depth}.")
+        elif arrays:
+            arrays.pop()
+            commas.pop()
+
+
+def _structure(body):
+    """
+    Remove strings and everything but brackets, braces and commas from a JSON
+    document.
+
+    """
+    if b"\\" in body:
+        # Strings may contain escaped quotes.
+        return STRINGS.sub(b"", body).translate(None, NOT_STRUCTURAL)
+    # Without escapes, every other quote opens a string.
+    parts = body.translate(None, NOT_STRUCTURAL_OR_QUOTE).split(b'"')
+    return b"".join(parts[::2])
+
+
+def _exceeded(message):
+    raise LimitExceeded({"_schema": [message]})
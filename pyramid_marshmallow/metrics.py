@@ -0,0 +1,239 @@
+import bisect
+import socket
+import threading
+import time
+from collections import namedtuple
+from types import GeneratorType
+
+from pyramid.config import PHASE1_CONFIG
+from pyramid.response import Response
+from zope.interface import Interface, implementer
+
+Measurement = namedtuple(
+    "Measurement",
+    [
+        "view",  # The route name, or the dotted name of the view callable.
+        "phase",  # "load" or "dump"
+        "duration",  # Seconds spent decoding/loading or dumping/encoding.
+        "size",  # Payload size in bytes, or `None` if not known.
+        "error",  # Whether the phase raised an exception.
+    ],
+)
+
+
+class IMetricsSink(Interface):
+    """
+    Interface for a callable receiving a :class:`Measurement` for each load
+    and dump performed by the view derivers.
+
+    """
+
+    def __call__(measurement): ...
+
+
+def set_metrics_sink(config, sink):
+    """
+    Set the sink for validation and marshalling metrics.  `sink` may be any
+    callable accepting a :class:`Measurement` or a dotted name resolving to
+    one.  Must be called before views are configured.
+
+    """
+    sink = config.maybe_dotted(sink)
+
+    def register():
+        config.registry.registerUtility(sink, IMetricsSink)
+
+    config.action(
+        ("pyramid_marshmallow", "metrics_sink"),
+        register,
+        order=PHASE1_CONFIG,
+    )
+
+
+def view_name(info):
+    route_name = info.options.get("route_name")
+    if route_name:
+        return route_name
+    view = info.original_view
+    name = getattr(view, "__qualname__", None) or type(view).__qualname__
+    return view.__module__ + "." + name
+
+
+def _measured_iter(iterable, record):
+    """
+    Wrap an iterable, timing how long it takes to produce its items.  `record`
+    is called with the total duration, the number of bytes produced (if the
+    items are bytes) and whether an exception was raised.
+
+    """
+    duration = 0.0
+    size = 0
+    error = False
+    iterator = iter(iterable)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            except Exception:
+                error = True
+                raise
+            finally:
+                duration += time.perf_counter() - start
+            if isinstance(item, bytes):
+                size += len(item)
+            yield item
+    finally:
+        record(duration, size, error)
+
+
+def measure_load(validate, sink, view):
+    """
+    Wrap a function taking a request and returning the loaded data, sending a
+    measurement to the sink for each call.
+
+    """
+
+    def measured(request):
+        if request.method == "GET":
+            size = len(request.query_string)
+        else:
+            size = request.content_length
+        start = time.perf_counter()
+        try:
+            data = validate(request)
+        except Exception:
+            duration = time.perf_counter() - start
+            sink(Measurement(view, "load", duration, size, True))
+            raise
+        duration = time.perf_counter() - start
+        if not isinstance(data, GeneratorType):
+            sink(Measurement(view, "load", duration, size, False))
+            return data
+
+        def record(iter_duration, _, error):
+            total = duration + iter_duration
+            sink(Measurement(view, "load", total, size, error))
+
+        return _measured_iter(data, record)
+
+    return measured
+
+
+def measure_dump(serialize, sink, view):
+    """
+    Wrap a function taking the view output and returning the marshalled
+    result, sending a measurement to the sink for each call.  Streamed
+    responses are measured as they are sent.
+
+    """
+
+    def measured(output, *args):
+        start = time.perf_counter()
+        try:
+            result = serialize(output, *args)
+        except Exception:
+            duration = time.perf_counter() - start
+            sink(Measurement(view, "dump", duration, None, True))
+            raise
+        duration = time.perf_counter() - start
+        if not isinstance(result, Response):
+            sink(Measurement(view, "dump", duration, None, False))
+            return result
+
+        def record(iter_duration, size, error):
+            total = duration + iter_duration
+            sink(Measurement(view, "dump", total, size, error))
+
+        result.app_iter = _measured_iter(result.app_iter, record)
+        return result
+
+    return measured
+
+
+# Upper bounds of histogram buckets, in seconds.
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    float("inf"),
+)
+
+
+@implementer(IMetricsSink)
+class MemorySink:
+    """
+    Aggregate measurements in memory, per view and phase.  Useful for tests
+    and for exposing statistics through a debugging endpoint.
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.stats = dict()
+        self.lock = threading.Lock()
+
+    def __call__(self, measurement):
+        key = (measurement.view, measurement.phase)
+        index = bisect.bisect_left(self.buckets, measurement.duration)
+        with self.lock:
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = {
+                    "count": 0,
+                    "errors": 0,
+                    "duration": 0.0,
+                    "size": 0,
+                    "histogram": [0] * len(self.buckets),
+                }
+            stats["count"] += 1
+            stats["errors"] += measurement.error
+            stats["duration"] += measurement.duration
+            stats["size"] += measurement.size or 0
+            stats["histogram"][index] += 1
+
+    def snapshot(self):
+        """
+        Return a copy of the statistics, keyed by ``(view, phase)``.
+
+        """
+        with self.lock:
+            return {
+                key: dict(stats, histogram=list(stats["histogram"]))
+                for key, stats in self.stats.items()
+            }
+
+
+@implementer(IMetricsSink)
+class StatsdSink:
+    """
+    Send measurements to a statsd server over UDP.  Durations are sent as
+    timers, sizes as histograms and errors as counters, named
+    ``<prefix>.<view>.<phase>.<metric>``.
+
+    """
+
+    def __init__(self, host="localhost", port=8125, prefix="marshmallow"):
+        self.address = (host, int(port))
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def __call__(self, measurement):
+        name = f"{self.prefix}.{measurement.view}.{measurement.phase}"
+        lines = [f"{name}.time:{measurement.duration * 1000:.3f}|ms"]
+        if measurement.size is not None:
+            lines.append(f"{name}.size:{measurement.size}|h")
+        if measurement.error:
+            lines.append(f"{name}.errors:1|c")
+        try:
+            self.socket.sendto("\n".join(lines).encode(), self.address)
+        except OSError:
+            pass
@@ -0,0 +1,164 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from marshmallow import ValidationError
+from zope.interface import Interface, implementer
+
+# Request bodies of at least this many bytes are loaded in the pool.
+DEFAULT_THRESHOLD = 1024 * 1024
+
+# Collections of at least this many items are dumped in the pool.
+DEFAULT_ITEMS = 1000
+
+# Functions which may be called in the pool, by index.  Workers are forked,
+# so they inherit every function registered before the pool was started,
+# closures included, and only the index needs to be sent to them.
+_functions = []
+_functions_lock = threading.Lock()
+
+_OK = "ok"
+_INVALID = "invalid"
+_MISSING = "missing"
+
+
+def _call(index, *args):
+    """
+    Run a registered function in a worker.  Validation errors are returned
+    rather than raised, so that they are rebuilt in the parent.
+
+    """
+    if index >= len(_functions):
+        # Registered after this worker was forked.
+        return _MISSING, None
+    try:
+        return _OK, _functions[index](*args)
+    except ValidationError as err:
+        return _INVALID, (err.messages, err.field_name, err.valid_data)
+
+
+def _noop():
+    pass
+
+
+class IOffloadPool(Interface):
+    """
+    Interface for the process pool which large loads and dumps are offloaded
+    to.
+
+    """
+
+    def wrap(func): ...
+
+
+@implementer(IOffloadPool)
+class OffloadPool:
+    """
+    A pool of forked worker processes.  Functions wrapped with :meth:`wrap`
+    before the pool is started are run in a worker when called.
+
+    Workers are forked when :meth:`start` is called, which happens once the
+    application is created, before the server starts any threads.  On
+    platforms without `fork`, functions are called in-process.
+
+    """
+
+    def __init__(self, processes=None):
+        self.processes = int(processes) if processes else None
+        self.executor = None
+        self.started = False
+        self.pid = None
+        self.wrapped = 0
+        self.lock = threading.Lock()
+
+    def wrap(self, func):
+        """
+        Register the function, returning a function with the same signature
+        which calls it in a worker process.  Its arguments and return value
+        must be picklable.
+
+        """
+        with _functions_lock:
+            index = len(_functions)
+            _functions.append(func)
+        self.wrapped += 1
+
+        def offloaded(*args):
+            executor = self.start()
+            if executor is None:
+                return func(*args)
+            status, result = executor.submit(_call, index, *args).result()
+            if status == _OK:
+                return result
+            elif status == _INVALID:
+                messages, field_name, valid_data = result
+                raise ValidationError(
+                    messages,
+                    field_name=field_name,
+                    valid_data=valid_data,
+                )
+            else:
+                return func(*args)
+
+        return offloaded
+
+    def start(self):
+        """
+        Fork the workers, if not already started by this process.  Returns
+        the executor, or `None` if `fork` is unavailable.
+
+        """
+        with self.lock:
+            if self.started and self.pid == os.getpid():
+                return self.executor
+            # Servers which fork after loading the application inherit an
+            # executor whose threads only exist in the parent, so each
+            # process starts a pool of its own.
+            self.started = True
+            self.pid = os.getpid()
+            if "fork" not in multiprocessing.get_all_start_methods():
+                return None
+            self.executor = ProcessPoolExecutor(
+                self.processes,
+                mp_context=multiprocessing.get_context("fork"),
+            )
+            # Forked workers are all started on the first submission.
+            self.executor.submit(_noop).result()
+            return self.executor
+
+    def shutdown(self):
+        with self.lock:
+            if self.executor is not None:
+                self.executor.shutdown()
+            self.executor = None
+            self.started = False
+
+
+def offload_collections(dump, offloaded, min_items):
+    """
+    Return a dump function calling `offloaded` for collections of at least
+    `min_items` items, and `dump` otherwise.
+
+    """
+
+    def call(output):
+        try:
+            size = len(output)
+        except TypeError:
+            size = 0
+        if size >= min_items:
+            return offloaded(output)
+        return dump(output)
+
+    return call
+
+
+def start_pool(event):
+    """
+    Start the pool once the application is created, if any views use it.
+
+    """
+    pool = event.app.registry.queryUtility(IOffloadPool)
+    if pool is not None and pool.wrapped:
+        pool.start()
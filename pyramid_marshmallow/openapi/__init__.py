@@ -1,10 +1,22 @@
 import functools
-import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
 
-from pyramid.response import Response
+from pyramid.events import ApplicationCreated
+from pyramid.settings import asbool
 from zope.interface import Interface, implementer
 
-from .spec import create_spec, generate_html, generate_yaml
+from ..jsonbackend import settings_backend
+from .render import render_spec, spec_response
+from .spec import (
+    apply_merges,
+    create_base_spec,
+    create_base_specs,
+    merge_files,
+    merge_stamp,
+)
 
 
 def includeme(config):
@@ -26,22 +38,261 @@ class ISpecGenerator(Interface):
     def __call__(zone, merge): ...
 
 
+DEFAULT_CACHE_SIZE = 32
+
+
 @implementer(ISpecGenerator)
 class SpecGenerator:
     """
     Generate and cache specs for the given registry.
 
+    Each spec is only generated once, even if requested by several threads
+    at once.  Specs may be generated ahead of time in a background thread
+    with :meth:`warm`.  Serialized and compressed specs are cached by
+    :meth:`render`.  The spec generated from the application is cached
+    separately from merge files, and specs are merged again whenever a
+    merge file is modified.
+
+    At most `maxsize` specs are kept, discarding the least recently used.
+    It defaults to the `openapi.cache_size` setting, or 32 if not set.
+
     """
 
-    def __init__(self, registry):
+    def __init__(self, registry, maxsize=None):
         self.registry = registry
+        if maxsize is None:
+            settings = registry.settings or {}
+            maxsize = settings.get("openapi.cache_size", DEFAULT_CACHE_SIZE)
+        self.maxsize = int(maxsize)
+        self.bases = dict()
+        self.futures = OrderedDict()
+        self.rendered = dict()
+        self.lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "builds": 0,
+            "build_time": 0.0,
+        }
 
     def __call__(self, zone, merge):
-        return self._call(zone, tuple(merge) if merge else tuple())
+        key = (zone, tuple(merge) if merge else tuple())
+        while True:
+            future, owner = self._future(key)
+            if owner:
+                self._build(key, future)
+            spec = future.result()
+            if owner or self._stamps(key) == future.stamps:
+                return spec
+            # A merge file has changed, discard the spec and merge again.
+            with self.lock:
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+
+    def render(self, zone, merge, format):
+        """
+        Return the spec serialized in the given format, as a
+        :class:`pyramid_marshmallow.openapi.render.RenderedSpec`.
+
+        """
+        spec = self(zone, merge)
+        key = (zone, tuple(merge) if merge else tuple(), format)
+        with self.lock:
+            cached = self.rendered.get(key)
+        if cached is not None and cached[0] is spec:
+            return cached[1]
+        backend = settings_backend(self.registry.settings)
+        rendered = render_spec(spec, format, backend)
+        with self.lock:
+            self.rendered[key] = (spec, rendered)
+        return rendered
+
+    def warm(self, zone, merge):
+        """
+        Start generating the spec in a background thread, if it isn't already
+        generated or being generated.  Returns a future for the spec.
+
+        """
+        return self.warm_many([(zone, merge)])[0]
+
+    def warm_many(self, specs):
+        """
+        Like :meth:`warm`, for a list of ``(zone, merge)`` pairs.  The specs
+        for all the zones are generated together, in a single pass over the
+        application.  Returns a list of futures.
+
+        """
+        futures = []
+        owned = []
+        for zone, merge in specs:
+            key = (zone, tuple(merge) if merge else tuple())
+            future, owner = self._future(key)
+            futures.append(future)
+            if owner:
+                owned.append((key, future))
+        if owned:
+            threading.Thread(
+                target=self._build_many,
+                args=(owned,),
+                name="pyramid_marshmallow-spec",
+                daemon=True,
+            ).start()
+        return futures
+
+    def _future(self, key):
+        """
+        Return the future for the given key and whether the caller is
+        responsible for building the spec.
+
+        """
+        with self.lock:
+            future = self.futures.get(key)
+            if future is not None:
+                self.futures.move_to_end(key)
+                self._stats["hits"] += 1
+                return future, False
+            future = self.futures[key] = Future()
+            self._stats["misses"] += 1
+            self._evict()
+            return future, True
+
+    def _evict(self):
+        """
+        Discard the least recently used specs until the cache is within
+        bounds.  Specs still being built are kept.
+
+        """
+        excess = len(self.futures) - self.maxsize
+        if excess <= 0:
+            return
+        for key, future in list(self.futures.items()):
+            if excess <= 0:
+                break
+            if not future.done():
+                continue
+            del self.futures[key]
+            for rendered_key in list(self.rendered):
+                if rendered_key[:2] == key:
+                    del self.rendered[rendered_key]
+            self._stats["evictions"] += 1
+            excess -= 1
+
+    def invalidate(self, zone=None):
+        """
+        Discard the cached specs for the given zone, or all specs if no zone
+        is given, so that they are regenerated from the application on the
+        next request.
+
+        """
+        with self.lock:
+            if zone is None:
+                self.bases.clear()
+                self.futures.clear()
+                self.rendered.clear()
+                return
+            self.bases.pop(zone, None)
+            for key in list(self.futures):
+                if key[0] == zone:
+                    del self.futures[key]
+            for key in list(self.rendered):
+                if key[0] == zone:
+                    del self.rendered[key]
+
+    def reload_merges(self):
+        """
+        Discard the cached specs, so they are regenerated from the cached
+        application spec and the current contents of the merge files.
+
+        """
+        with self.lock:
+            self.futures.clear()
+
+    def stats(self):
+        """
+        Return cache statistics:  The number of `hits` and `misses`, the
+        number of specs evicted, the number of specs built and the total time
+        spent building them, in seconds, and the number of cached specs.
+
+        """
+        with self.lock:
+            return dict(self._stats, size=len(self.futures))
+
+    def _base(self, zone):
+        with self.lock:
+            base = self.bases.get(zone)
+        if base is None:
+            base = create_base_spec(self.registry, zone=zone)
+            with self.lock:
+                base = self.bases.setdefault(zone, base)
+        return base
+
+    def _build_many(self, owned):
+        with self.lock:
+            zones = [key[0] for key, _ in owned if key[0] not in self.bases]
+        if len(zones) > 1:
+            try:
+                bases = create_base_specs(self.registry, zones)
+            except Exception:
+                # Leave it to `_build` to try again and report the error.
+                bases = dict()
+            with self.lock:
+                for zone, base in bases.items():
+                    self.bases.setdefault(zone, base)
+        for key, future in owned:
+            self._build(key, future)
+
+    def _merges(self, key):
+        merge_setting = self.registry.settings.get("openapi.merge")
+        return merge_files(key[1], merge_setting)
+
+    def _stamps(self, key):
+        return [merge_stamp(mergefile) for mergefile in self._merges(key)]
+
+    def _build(self, key, future):
+        zone, merge = key
+        start = time.perf_counter()
+        try:
+            # Stamp before reading, so changes made while merging are caught.
+            future.stamps = self._stamps(key)
+            spec = apply_merges(self._base(zone), self._merges(key))
+        except BaseException as exc:
+            # Don't cache failures, so that the next request tries again.
+            with self.lock:
+                if self.futures.get(key) is future:
+                    del self.futures[key]
+            future.set_exception(exc)
+        else:
+            future.set_result(spec)
+        finally:
+            with self.lock:
+                self._stats["builds"] += 1
+                self._stats["build_time"] += time.perf_counter() - start
+
+
+def _warm_on_startup(config, zone=None, merge=None):
+    """
+    If the `openapi.warm` setting is enabled, generate the spec in the
+    background once the application has been created.
+
+    """
+    if not asbool(config.get_settings().get("openapi.warm")):
+        return
+    specs = getattr(config.registry, "_openapi_warm", None)
+    if specs is None:
+        specs = config.registry._openapi_warm = []
+        config.add_subscriber(_warm, ApplicationCreated)
+    specs.append((zone, merge))
 
-    @functools.lru_cache
-    def _call(self, zone, merge):
-        return create_spec(self.registry, zone=zone, merge=merge)
+
+def _warm(event):
+    registry = event.app.registry
+    generator = registry.getUtility(ISpecGenerator)
+    if hasattr(generator, "warm_many"):
+        generator.warm_many(registry._openapi_warm)
+    elif hasattr(generator, "warm"):
+        for zone, merge in registry._openapi_warm:
+            generator.warm(zone, merge)
 
 
 def _inject_params(view, zone=None, merge=None):
@@ -68,17 +319,23 @@ def add_openapi_json_view(config, zone=None, merge=None, *args, **kwargs):
         *args,
         **kwargs,
     )
+    _warm_on_startup(config, zone=zone, merge=merge)
 
 
-def json_view(request, zone=None, merge=None):
+def _spec_response(request, zone, merge, format):
     generator = request.registry.getUtility(ISpecGenerator)
-    indent = 2 if "pretty" in request.GET else None
-    body = json.dumps(generator(zone, merge), indent=indent)
-    return Response(
-        body=body,
-        content_type="application/json",
-        charset="utf-8",
-    )
+    render = getattr(generator, "render", None)
+    if render is not None:
+        rendered = render(zone, merge, format)
+    else:
+        backend = settings_backend(request.registry.settings)
+        rendered = render_spec(generator(zone, merge), format, backend)
+    return spec_response(request, rendered)
+
+
+def json_view(request, zone=None, merge=None):
+    format = "json-pretty" if "pretty" in request.GET else "json"
+    return _spec_response(request, zone, merge, format)
 
 
 def add_openapi_html_view(config, zone=None, merge=None, *args, **kwargs):
@@ -92,15 +349,11 @@ def add_openapi_html_view(config, zone=None, merge=None, *args, **kwargs):
         *args,
         **kwargs,
     )
+    _warm_on_startup(config, zone=zone, merge=merge)
 
 
 def html_view(request, zone=None, merge=None):
-    generator = request.registry.getUtility(ISpecGenerator)
-    body = generate_html(generator(zone, merge))
-    return Response(
-        body=body,
-        content_type="text/html",
-    )
+    return _spec_response(request, zone, merge, "html")
 
 
 def add_openapi_yaml_view(config, zone=None, merge=None, *args, **kwargs):
@@ -114,12 +367,8 @@ def add_openapi_yaml_view(config, zone=None, merge=None, *args, **kwargs):
         *args,
         **kwargs,
     )
+    _warm_on_startup(config, zone=zone, merge=merge)
 
 
 def yaml_view(request, zone=None, merge=None):
-    generator = request.registry.getUtility(ISpecGenerator)
-    body = generate_yaml(generator(zone, merge))
-    return Response(
-        body=body,
-        content_type="text/yaml",
-    )
+    return _spec_response(request, zone, merge, "yaml")
@@ -39,10 +39,11 @@ def import_app(args):
         raise ValueError("Must specify one of [app] or --ini.")
 
 
-def base_parser():
+def base_parser(multiple_zones=False):
     """
     Return an :class:`argpase.ArgumentParser` populated with arguments shared
-    between ``serve-spec`` and ``generate-spec``.
+    between ``serve-spec`` and ``generate-spec``.  If `multiple_zones` is set,
+    ``--zone`` may be given more than once.
     """
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -68,6 +69,7 @@ def base_parser():
     )
     parser.add_argument(
         "--zone",
+        action="append" if multiple_zones else "store",
         help=(
             "The API zone to generate spec for.  See documentation for more "
             "details."
@@ -1,14 +1,32 @@
-import json
 import os
 import sys
-import threading
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 
 import hupper
+import yaml
 
+from ..jsonbackend import get_backend, settings_backend
 from .cli import base_parser, import_app
-from .spec import create_spec, generate_html, generate_yaml
+from .spec import (
+    SafeLoader,
+    apply_merges,
+    create_base_specs,
+    generate_html,
+    generate_yaml,
+    list_zones,
+    merge_files,
+)
+from .watch import MergeWatcher
+
+FORMATS = ("json", "yaml", "html")
 
-parser = base_parser()
+parser = base_parser(multiple_zones=True)
+parser.add_argument(
+    "--all-zones",
+    action="store_true",
+    help="Generate a spec for every API zone in the application.",
+)
 parser.add_argument(
     "--format",
     help='The output, one of "json", "yaml", or "html".',
@@ -16,51 +34,208 @@ parser.add_argument(
 )
 parser.add_argument(
     "--output",
-    help="The file to output to.",
+    help=(
+        "The file to output to.  When generating multiple zones, must "
+        "contain `{zone}`, which is replaced with the zone name."
+    ),
     default="-",
 )
+parser.add_argument(
+    "--manifest",
+    help=(
+        "A YAML or JSON file listing specs to generate, each with an "
+        "`output` and optionally a `zone`, `merge` and `format`.  The "
+        "application is loaded once and the specs rendered in parallel."
+    ),
+)
+parser.add_argument(
+    "--processes",
+    type=int,
+    help=(
+        "The number of processes to render specs with when using "
+        "`--manifest`.  Defaults to the number of CPUs."
+    ),
+)
 
 
 def main():
     args = parser.parse_args()
-    if args.watch:
-        if args.output == "-":
+    multiple = args.all_zones or len(args.zone or []) > 1
+    if args.manifest:
+        if args.zone or args.all_zones or args.output != "-":
             sys.stderr.write(
-                "Cannot use stdout output with `--watch`.  Please set "
-                "`--output` to a filename.\n"
+                "Cannot use `--zone`, `--all-zones` or `--output` with "
+                "`--manifest`.\n"
             )
             return 1
-        reloader = hupper.start_reloader(
+    elif multiple and "{zone}" not in args.output:
+        sys.stderr.write(
+            "Multiple zones require `--output` to contain `{zone}`.\n"
+        )
+        return 1
+    elif args.watch and args.output == "-":
+        sys.stderr.write(
+            "Cannot use stdout output with `--watch`.  Please set "
+            "`--output` to a filename.\n"
+        )
+        return 1
+    if args.watch:
+        # Merge files are watched by the worker, so that changes to them
+        # don't require reloading the application.
+        hupper.start_reloader(
             "pyramid_marshmallow.openapi.generate.main",
             shutdown_interval=10,
         )
-        if args.merge:
-            reloader.watch_files(args.merge)
-    generate(args)
-    if hupper.is_active():
-        threading.Event().wait()  # Wait indefinitely
+    if args.manifest:
+        generate_manifest(args, watch=hupper.is_active())
+    else:
+        generate(args, watch=hupper.is_active())
     return 0
 
 
-def generate(args):
+def generate(args, watch=False):
+    """
+    Generate the specs and write them out.  If `watch` is set, block forever,
+    regenerating the specs whenever a merge file changes.
+
+    """
     app = import_app(args)
-    spec_json = create_spec(app.registry, zone=args.zone, merge=args.merge)
-    if args.format == "json":
-        output = json.dumps(spec_json, sort_keys=True)
-    elif args.format == "yaml":
-        output = generate_yaml(spec_json)
-    elif args.format == "html":
-        output = generate_html(spec_json)
+    settings = app.registry.settings
+    if args.all_zones:
+        zones = list_zones(app.registry)
+    else:
+        zones = args.zone or [None]
+    bases = create_base_specs(app.registry, zones)
+    merges = merge_files(args.merge, settings.get("openapi.merge"))
+
+    def write_all():
+        for zone, base in bases.items():
+            output = args.output.replace("{zone}", zone or "")
+            write_spec(args, settings, apply_merges(base, merges), output)
+
+    write_all()
+    if watch:
+        MergeWatcher(merges, write_all).run()
+
+
+def load_manifest(path):
+    """
+    Load and validate a manifest, returning a list of jobs.  Each job is a
+    dictionary with `zone`, `merge`, `format` and `output` keys.
+
+    """
+    with open(path) as fh:
+        manifest = yaml.load(fh, Loader=SafeLoader)
+    if not isinstance(manifest, list):
+        raise ValueError("Manifest must be a list of specs.")
+    jobs = []
+    for entry in manifest:
+        if not isinstance(entry, dict) or "output" not in entry:
+            raise ValueError("Each spec in the manifest needs an `output`.")
+        job = {
+            "zone": entry.get("zone"),
+            "merge": entry.get("merge"),
+            "format": entry.get("format", "json"),
+            "output": entry["output"],
+        }
+        if job["format"] not in FORMATS:
+            raise ValueError(
+                'Format must be one of "json", "yaml", or "html".'
+            )
+        jobs.append(job)
+    return jobs
+
+
+def generate_manifest(args, watch=False):
+    """
+    Generate every spec in the manifest.  The application is loaded and
+    introspected once, and the specs are rendered and written in a process
+    pool.
+
+    """
+    jobs = load_manifest(args.manifest)
+    app = import_app(args)
+    settings = app.registry.settings
+    backend = settings_backend(settings).name
+    bases = create_base_specs(app.registry, [job["zone"] for job in jobs])
+    merge_setting = settings.get("openapi.merge")
+
+    def write_all():
+        tasks = []
+        for job in jobs:
+            merges = merge_files(job["merge"], merge_setting)
+            spec_json = apply_merges(bases[job["zone"]], merges)
+            tasks.append((spec_json, job["format"], job["output"], backend))
+        if args.processes == 1 or len(tasks) == 1:
+            for task in tasks:
+                render_to_file(*task)
+        else:
+            with ProcessPoolExecutor(args.processes) as pool:
+                # Consume the results, so any errors are raised.
+                list(pool.map(render_to_file, *zip(*tasks)))
+        sys.stdout.write(f"{len(tasks)} specs generated\n")
+
+    write_all()
+    if watch:
+        merges = set()
+        for job in jobs:
+            merges.update(merge_files(job["merge"], merge_setting))
+        MergeWatcher(sorted(merges), write_all).run()
+
+
+def render(spec_json, format, backend):
+    """
+    Render the spec in the given format, returning bytes.
+
+    """
+    if format == "json":
+        return backend.dumps(spec_json, sort_keys=True)
+    elif format == "yaml":
+        return generate_yaml(spec_json).encode("utf8")
+    elif format == "html":
+        return generate_html(spec_json, json_backend=backend).encode("utf8")
     else:
         raise ValueError('Format must be one of "json", "yaml", or "html".')
-    if args.output == "-":
-        sys.stdout.write(output)
+
+
+def render_to_file(spec_json, format, output_file, backend_name):
+    write_atomic(
+        output_file,
+        render(spec_json, format, get_backend(backend_name)),
+    )
+
+
+def write_atomic(path, data):
+    """
+    Write to a temporary file and move it into place, so that readers never
+    see a partially written file.
+
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".spec-")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.chmod(tmp_path, 0o666 & ~_umask())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def write_spec(args, settings, spec_json, output_file):
+    output = render(spec_json, args.format, settings_backend(settings))
+    if output_file == "-":
+        sys.stdout.write(output.decode("utf8"))
         sys.stdout.write("\n")
     else:
-        with open(args.output, "wb") as fh:
-            if isinstance(output, str):
-                output = output.encode("utf8")
-            fh.write(output)
+        write_atomic(output_file, output)
         sys.stdout.write("Spec generated\n")
 
 
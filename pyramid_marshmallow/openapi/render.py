@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+from collections import namedtuple
+
+from pyramid.response import Response
+
+from .spec import generate_html, generate_yaml
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+RenderedSpec = namedtuple(
+    "RenderedSpec",
+    [
+        "content_type",
+        "etag",  # A digest of the uncompressed body.
+        "bodies",  # Content encoding to body, including "identity".
+    ],
+)
+
+FORMATS = {
+    "json": "application/json",
+    "json-pretty": "application/json",
+    "yaml": "text/yaml",
+    "html": "text/html",
+}
+
+
+def _serialize(spec, format, json_backend):
+    if format == "json":
+        return json_backend.dumps(spec)
+    elif format == "json-pretty":
+        return json_backend.dumps(spec, indent=True)
+    elif format == "yaml":
+        return generate_yaml(spec).encode("utf-8")
+    elif format == "html":
+        return generate_html(spec, json_backend=json_backend).encode("utf-8")
+    else:
+        raise ValueError(f"Unknown spec format {format!r}.")
+
+
+def render_spec(spec, format, json_backend):
+    """
+    Serialize the spec in the given format, along with compressed variants
+    of the body.
+
+    """
+    body = _serialize(spec, format, json_backend)
+    bodies = {
+        "identity": body,
+        "gzip": gzip.compress(body, compresslevel=9, mtime=0),
+    }
+    if brotli is not None:
+        bodies["br"] = brotli.compress(body)
+    return RenderedSpec(
+        content_type=FORMATS[format],
+        etag=hashlib.sha256(body).hexdigest()[:32],
+        bodies=bodies,
+    )
+
+
+def spec_response(request, rendered):
+    """
+    Create a response for the rendered spec, picking the best encoding the
+    client accepts.  The response is conditional, so clients sending a
+    matching `If-None-Match` get a 304.
+
+    """
+    encoding = "identity"
+    # Only compress if the client explicitly asks for it.
+    if request.accept_encoding:
+        offers = [e for e in rendered.bodies if e != "identity"]
+        acceptable = request.accept_encoding.acceptable_offers(offers)
+        if acceptable:
+            encoding = acceptable[0][0]
+    response = Response(
+        body=rendered.bodies[encoding],
+        content_type=rendered.content_type,
+        charset="utf-8",
+        conditional_response=True,
+    )
+    if encoding == "identity":
+        response.etag = rendered.etag
+    else:
+        response.etag = f"{rendered.etag}-{encoding}"
+        response.content_encoding = encoding
+    response.cache_control = "no-cache"
+    response.vary = ("Accept-Encoding",)
+    return response
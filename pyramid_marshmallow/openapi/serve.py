@@ -24,12 +24,12 @@ parser.add_argument(
 def main():
     args = parser.parse_args()
     if args.watch:
-        reloader = hupper.start_reloader(
+        # Changes to merge files are picked up by the spec generator, so
+        # they don't require reloading the application.
+        hupper.start_reloader(
             "pyramid_marshmallow.openapi.serve.main",
             shutdown_interval=10,
         )
-        if args.merge:
-            reloader.watch_files(args.merge)
     return serve(args)
 
 
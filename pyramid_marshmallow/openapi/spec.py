@@ -1,8 +1,15 @@
-import json
+import collections
+import copy
+import functools
+import os
+import threading
 
 import pkg_resources
-from marshmallow import Schema
 from pyramid.path import DottedNameResolver
+from pyramid.settings import asbool
+
+from .. import FIELDS_PARAM, process_schema
+from ..jsonbackend import get_backend
 
 try:
     import yaml
@@ -17,6 +24,9 @@ except ImportError:
         "You can install it with `pip install pyramid_marshmallow[openapi]."
     )
 
+# Use libyaml if available, it's much faster.
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def schema_name_resolver(schema):
     cls = resolve_schema_cls(schema)
@@ -66,9 +76,9 @@ def make_path(introspector, introspectable):
         return None
 
 
-def _schema(schema):
+def _schema(schema, registry=None):
     if isinstance(schema, dict):
-        return Schema.from_dict(schema)
+        return process_schema(schema, registry)
     else:
         return schema
 
@@ -79,6 +89,13 @@ def split_docstring(docstring):
     returned verbatim, the second half is parsed as YAML.
 
     """
+    summary, docs, parsed = _split_docstring(docstring)
+    # The parsed YAML is cached, so give each caller its own copy.
+    return summary, docs, copy.deepcopy(parsed)
+
+
+@functools.lru_cache(maxsize=None)
+def _split_docstring(docstring):
     split_lines = utils.trim_docstring(docstring).split("\n")
 
     # Cut YAML from rest of docstring
@@ -94,42 +111,61 @@ def split_docstring(docstring):
     docs = "\n".join(split_lines[1:cut_from]).strip() or None
     yaml_string = "\n".join(split_lines[cut_from:])
     if yaml_string:
-        parsed = yaml.safe_load(yaml_string)
+        parsed = yaml.load(yaml_string, Loader=SafeLoader)
     else:
         parsed = dict()
     return summary, docs, parsed
 
 
-def set_request_body(spec, op, view):
+def set_request_body(spec, op, view, registry=None):
     op["requestBody"] = {
         "content": {
             "application/json": {
-                "schema": _schema(view["validate"]),
+                "schema": _schema(view["validate"], registry),
             },
         },
     }
 
 
-def set_query_params(spec, op, view):
+def set_query_params(spec, op, view, registry=None):
     op["parameters"].append(
         {
             "in": "query",
-            "schema": _schema(view["validate"]),
+            "schema": _schema(view["validate"], registry),
         }
     )
 
 
-def set_response_body(spec, op, view):
+def set_response_body(spec, op, view, registry=None):
     op["responses"]["200"] = {
         "description": "",
         "content": {
             "application/json": {
-                "schema": _schema(view["marshal"]),
+                "schema": _schema(view["marshal"], registry),
             },
         },
     }
 
 
+def set_fields_param(spec, op, view):
+    if not asbool(view.get("marshal_fields")):
+        return
+    param = {
+        "in": "query",
+        "name": FIELDS_PARAM,
+        "required": False,
+        "description": (
+            "A comma-separated list of fields to include in the response.  "
+            "Nested fields are separated with a dot, such as `owner.id`."
+        ),
+    }
+    if spec.openapi_version.major < 3:
+        param["type"] = "string"
+    else:
+        param["schema"] = {"type": "string"}
+    op["parameters"].append(param)
+
+
 def set_url_params(spec, op, view):
     context = view["context"]
     if not context:
@@ -159,6 +195,115 @@ def set_tag(spec, op, view):
 
 
 def create_spec(registry, zone=None, merge=None):
+    spec = create_base_spec(registry, zone=zone)
+    merges = merge_files(merge, registry.settings.get("openapi.merge"))
+    return apply_merges(spec, merges)
+
+
+def create_specs(registry, zones, merge=None):
+    """
+    Generate the specs for several zones at once, returning a dictionary of
+    zone to spec.  See :func:`create_base_specs`.
+
+    """
+    merges = merge_files(merge, registry.settings.get("openapi.merge"))
+    return {
+        zone: apply_merges(spec, merges)
+        for zone, spec in create_base_specs(registry, zones).items()
+    }
+
+
+def list_zones(registry):
+    """
+    Return the names of all API zones in the application.
+
+    """
+    zones = set()
+    for _, operations in list_paths(registry.introspector):
+        for view in operations.values():
+            if view.get("api_zone") is not None:
+                zones.add(view["api_zone"])
+    return sorted(zones)
+
+
+def create_base_spec(registry, zone=None):
+    """
+    Generate the spec from the application, without applying merge files.
+
+    """
+    spec, _, _, _ = _build_spec(registry, [zone])
+    return spec
+
+
+def create_base_specs(registry, zones):
+    """
+    Generate the specs for several zones, without applying merge files.
+
+    The application is introspected and schemas are resolved once, for all
+    the zones together.  Each zone's spec is then cut down to its own
+    operations and the components and tags they reference.  Zones which
+    can't be cut out of the combined spec unchanged are built on their own.
+
+    """
+    zones = list(dict.fromkeys(zones))
+    if len(zones) == 1:
+        return {zones[0]: create_base_spec(registry, zones[0])}
+    full, before, op_zones, collisions = _build_spec(registry, zones)
+    specs = dict()
+    for zone in zones:
+        paths = _zone_paths(full, op_zones, zone)
+        spec = None if paths is None else _prune_spec(full, before, paths)
+        if spec is None or _renamed(spec, collisions):
+            spec = create_base_spec(registry, zone)
+        specs[zone] = spec
+    return specs
+
+
+def _renamed(spec, collisions):
+    """
+    Return true if the spec has schemas which may have been renamed because
+    another schema had the same name.  Apispec adds a number to the name of
+    the later schemas, which depends on the other zones built with them.
+
+    """
+    if "openapi" in spec:
+        schemas = spec.get("components", {}).get("schemas", {})
+    else:
+        schemas = spec.get("definitions", {})
+    return any(name.rstrip("0123456789") in collisions for name in schemas)
+
+
+def _zone_paths(spec, op_zones, zone):
+    """
+    Return the paths of the combined spec with only the operations in the
+    given zone, or `None` if they can't be separated.
+
+    """
+    paths = dict()
+    for path, item in spec["paths"].items():
+        paths[path] = dict()
+        for key, value in item.items():
+            view_zones = op_zones.get((path, key))
+            if view_zones is None:
+                # Not an operation, such as path-level parameters.
+                paths[path][key] = value
+            elif len(view_zones) > 1:
+                # Views in different zones share the path and method, so
+                # only one of them made it into the combined spec.
+                return None
+            elif zone is None or zone in view_zones:
+                paths[path][key] = value
+    return paths
+
+
+def _build_spec(registry, zones):
+    """
+    Build the spec for the union of the given zones.  Returns the spec, the
+    spec as it was before any paths were added, a dictionary mapping each
+    path and method to the zones of the views providing it, and the schema
+    names given to more than one schema.
+
+    """
     settings = registry.settings
     REQUIRED_SETTINGS = [
         "openapi.title",
@@ -175,9 +320,16 @@ def create_spec(registry, zone=None, merge=None):
             "openapi.plugin", "apispec.ext.marshmallow.MarshmallowPlugin"
         )
     )
-    marshmallow_plugin = MarshmallowPlugin(
-        schema_name_resolver=schema_name_resolver
-    )
+    # Apispec resolves the name of each schema once.
+    names = collections.Counter()
+
+    def resolve_name(schema):
+        name = schema_name_resolver(schema)
+        if name:
+            names[name] += 1
+        return name
+
+    marshmallow_plugin = MarshmallowPlugin(schema_name_resolver=resolve_name)
     spec = APISpec(
         title=settings["openapi.title"],
         version=settings["openapi.version"],
@@ -188,11 +340,15 @@ def create_spec(registry, zone=None, merge=None):
     if plugin_hook:
         plugin_hook = name_resolver.maybe_resolve(plugin_hook)
         plugin_hook(registry, spec, marshmallow_plugin)
+    before = copy.deepcopy(spec.to_dict())
+    op_zones = dict()
     for path, operations in list_paths(registry.introspector):
         final_ops = dict()
         for method, view in operations.items():
-            if zone is not None and zone != view.get("api_zone"):
+            zone = view.get("api_zone")
+            if None not in zones and zone not in zones:
                 continue
+            op_zones.setdefault((path, method), set()).add(zone)
             summary, descr, user_op = split_docstring(view["callable"].__doc__)
             op = {
                 "responses": dict(),
@@ -205,11 +361,12 @@ def create_spec(registry, zone=None, merge=None):
             set_url_params(spec, op, view)
             if "validate" in view:
                 if method == "get":
-                    set_query_params(spec, op, view)
+                    set_query_params(spec, op, view, registry)
                 else:
-                    set_request_body(spec, op, view)
+                    set_request_body(spec, op, view, registry)
             if "marshal" in view:
-                set_response_body(spec, op, view)
+                set_response_body(spec, op, view, registry)
+                set_fields_param(spec, op, view)
             set_tag(spec, op, view)
             final_op = utils.deepupdate(op, user_op)
             final_op = utils.deepupdate(final_op, view.get("api_spec", dict()))
@@ -222,42 +379,226 @@ def create_spec(registry, zone=None, merge=None):
             final_ops[method] = final_op
         spec.path(path, operations=final_ops)
 
-    json = spec.to_dict()
-    return _perform_merges(json, merge, settings.get("openapi.merge"))
+    collisions = {name for name, count in names.items() if count > 1}
+    return spec.to_dict(), before, op_zones, collisions
+
+
+# Top-level component sections in Swagger 2.0.  In OpenAPI 3, components are
+# nested under `components`.
+V2_COMPONENTS = (
+    "definitions",
+    "parameters",
+    "responses",
+    "securityDefinitions",
+)
+
 
+def _components(spec):
+    """
+    Return the location of each component in the spec, as a tuple of keys.
 
-def _perform_merges(json, mergefile, merge_setting):
-    # Perform merges
+    """
+    if "openapi" in spec:
+        return {
+            ("components", section, name)
+            for section, items in spec.get("components", {}).items()
+            for name in items
+        }
+    return {
+        (section, name)
+        for section in V2_COMPONENTS
+        for name in spec.get(section, {})
+    }
+
+
+def _refs(value):
+    """
+    Yield the location of each local reference in a spec fragment.
+
+    """
+    if isinstance(value, dict):
+        ref = value.get("$ref")
+        if isinstance(ref, str) and ref.startswith("#/"):
+            yield tuple(
+                part.replace("~1", "/").replace("~0", "~")
+                for part in ref[2:].split("/")
+            )
+        for item in value.values():
+            yield from _refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _refs(item)
+
+
+def _lookup(spec, location):
+    for key in location:
+        spec = spec[key]
+    return spec
+
+
+def _prune_spec(full, before, paths):
+    """
+    Cut the combined spec down to the given paths.  Components and tags added
+    while generating operations are kept only if referenced.
+
+    """
+    explicit = _components(before)
+    added = _components(full) - explicit
+    spec = dict(full, paths=paths)
+
+    # Find the components reachable from everything but the added components.
+    stack = list(_refs(paths))
+    for location in explicit:
+        stack.extend(_refs(_lookup(full, location)))
+    for key, value in full.items():
+        if key not in ("paths", "components", *V2_COMPONENTS):
+            stack.extend(_refs(value))
+    reachable = set()
+    while stack:
+        location = stack.pop()
+        if location in added and location not in reachable:
+            reachable.add(location)
+            stack.extend(_refs(_lookup(full, location)))
+
+    keep = explicit | reachable
+    if "openapi" in full:
+        components = dict()
+        for section, items in full.get("components", {}).items():
+            items = {
+                name: value
+                for name, value in items.items()
+                if ("components", section, name) in keep
+            }
+            if items or section in before.get("components", {}):
+                components[section] = items
+        if components:
+            spec["components"] = components
+        else:
+            spec.pop("components", None)
+    else:
+        for section in V2_COMPONENTS:
+            if section not in full:
+                continue
+            items = {
+                name: value
+                for name, value in full[section].items()
+                if (section, name) in keep
+            }
+            if items or section in before:
+                spec[section] = items
+            else:
+                del spec[section]
+
+    if "tags" in full:
+        used = {
+            tag
+            for item in paths.values()
+            for op in item.values()
+            if isinstance(op, dict)
+            for tag in op.get("tags", [])
+        }
+        explicit_tags = {tag["name"] for tag in before.get("tags", [])}
+        tags = [
+            tag
+            for tag in full["tags"]
+            if tag["name"] in used or tag["name"] in explicit_tags
+        ]
+        if tags:
+            spec["tags"] = tags
+        else:
+            del spec["tags"]
+    return copy.deepcopy(spec)
+
+
+def merge_files(mergefile, merge_setting):
+    """
+    Return a list of merge files from the `merge` argument and the
+    `openapi.merge` setting.
+
+    """
     if mergefile is None:
         merges = []
     elif isinstance(mergefile, str):
         merges = [mergefile]
     else:
-        merges = mergefile
+        merges = list(mergefile)
     if not merge_setting:
         pass
     elif isinstance(merge_setting, str):
         merges.extend(x.strip() for x in merge_setting.split(","))
     else:
         merges.extend(merge_setting)
+    return merges
+
+
+def apply_merges(spec, merges):
+    """
+    Merge each file into the spec.  The given spec is not modified.
+
+    """
     for mergefile in merges:
-        json = merge(json, mergefile)
-    return json
+        spec = merge(spec, mergefile)
+    return spec
 
 
-def merge(spec, mergefile):
+def merge_path(mergefile):
+    """
+    Return the filesystem path of a merge file.
+
+    """
     if ":" in mergefile:
         module, _, path = mergefile.partition(":")
-        fh = pkg_resources.resource_stream(module, path)
+        return pkg_resources.resource_filename(module, path)
+    return mergefile
+
+
+def merge_stamp(mergefile):
+    """
+    Return the modification time and size of a merge file, or `None` if it
+    doesn't exist.
+
+    """
+    try:
+        stat = os.stat(merge_path(mergefile))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Parsed merge files, keyed by path, along with the stamp they were read at.
+_merge_cache = dict()
+_merge_cache_lock = threading.Lock()
+
+
+def load_merge(mergefile):
+    """
+    Parse a merge file.  The result is cached until the file's modification
+    time or size changes.
+
+    """
+    path = merge_path(mergefile)
+    stamp = merge_stamp(mergefile)
+    with _merge_cache_lock:
+        cached = _merge_cache.get(path)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        to_merge = cached[1]
     else:
-        fh = open(mergefile)
-    with fh:
-        to_merge = yaml.safe_load(fh)
-    return utils.deepupdate(spec, to_merge)
+        with open(path) as fh:
+            to_merge = yaml.load(fh, Loader=SafeLoader)
+        with _merge_cache_lock:
+            _merge_cache[path] = (stamp, to_merge)
+    # The merged spec shares objects with the document, so copy it to keep
+    # the cache safe from changes to the spec.
+    return copy.deepcopy(to_merge)
+
+
+def merge(spec, mergefile):
+    return utils.deepupdate(spec, load_merge(mergefile))
 
 
-def generate_html(spec):
-    data = json.dumps(spec, sort_keys=True)
+def generate_html(spec, json_backend=None):
+    json_backend = json_backend or get_backend()
+    data = json_backend.dumps(spec, sort_keys=True).decode("utf-8")
     return HTML_TEMPLATE.format(
         title=spec["info"]["title"],
         version=spec["info"]["version"],
@@ -0,0 +1,46 @@
+import time
+
+from .spec import merge_stamp
+
+
+class MergeWatcher:
+    """
+    Poll merge files for changes, calling `callback` with no arguments when
+    any of them is modified.
+
+    Merge files are handled in-process rather than by restarting the whole
+    application, as only the merge step of spec generation needs redoing.
+
+    """
+
+    def __init__(self, merges, callback, interval=1.0):
+        self.merges = list(merges)
+        self.callback = callback
+        self.interval = interval
+        self.stamps = self._stamps()
+
+    def _stamps(self):
+        return [merge_stamp(mergefile) for mergefile in self.merges]
+
+    def check(self):
+        """
+        Call the callback if any merge file has changed since the last check.
+        Returns whether a change was found.
+
+        """
+        stamps = self._stamps()
+        if stamps == self.stamps:
+            return False
+        self.stamps = stamps
+        self.callback()
+        return True
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as exc:
+                # Likely a syntax error in the merge file.  Keep watching,
+                # it'll be retried when the file is fixed.
+                print(f"Error reloading merge files: {exc}")  # noqa: T201
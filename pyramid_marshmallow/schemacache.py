@@ -0,0 +1,126 @@
+import inspect
+from collections.abc import Mapping, Sequence, Set
+
+from marshmallow import Schema
+from marshmallow.fields import Field
+from marshmallow.validate import Validator
+from zope.interface import Interface, implementer
+
+# Attributes set when a field is bound to a schema or cached lazily, which
+# don't affect how the field behaves.
+IGNORED_ATTRIBUTES = frozenset(("parent", "name", "root", "_schema"))
+
+# Constructor arguments that determine how a schema instance behaves, beyond
+# its class.
+SCHEMA_ATTRIBUTES = (
+    "many",
+    "only",
+    "exclude",
+    "ordered",
+    "load_only",
+    "dump_only",
+    "partial",
+    "unknown",
+    "context",
+)
+
+
+class _Unfingerprintable(Exception):
+    pass
+
+
+def fingerprint(value):
+    """
+    Return a hashable structural fingerprint of a value, such as a dictionary
+    of fields.  Two values with the same fingerprint are of the same types and
+    have the same options, recursively.  Returns `None` if the value can't be
+    fingerprinted.
+
+    """
+    try:
+        return _fingerprint(value, set())
+    except _Unfingerprintable:
+        return None
+
+
+def _fingerprint(value, seen):
+    if value is None or isinstance(value, (str, bytes, int, float)):
+        # Include the type so that `True`, `1` and `1.0` are distinct.
+        return (type(value), value)
+    elif isinstance(value, type) or inspect.isroutine(value):
+        return value
+    if id(value) in seen:
+        raise _Unfingerprintable()
+    seen = seen | {id(value)}
+    if isinstance(value, Schema):
+        return (
+            type(value),
+            tuple(
+                _fingerprint(getattr(value, attr, None), seen)
+                for attr in SCHEMA_ATTRIBUTES
+            ),
+        )
+    elif callable(value) and not isinstance(value, (Field, Validator)):
+        # Callables such as `functools.partial` may keep state outside of
+        # `vars()`, so only compare them by identity.  The cached schema
+        # keeps them alive, so the id isn't reused.
+        return (type(value), id(value))
+    elif isinstance(value, Mapping):
+        return (
+            type(value),
+            tuple(
+                (_fingerprint(k, seen), _fingerprint(v, seen))
+                for k, v in value.items()
+            ),
+        )
+    elif isinstance(value, Sequence):
+        return (type(value), tuple(_fingerprint(x, seen) for x in value))
+    elif isinstance(value, Set):
+        return (type(value), frozenset(_fingerprint(x, seen) for x in value))
+    elif hasattr(value, "__dict__"):
+        return (
+            type(value),
+            tuple(
+                sorted(
+                    (k, _fingerprint(v, seen))
+                    for k, v in vars(value).items()
+                    if k not in IGNORED_ATTRIBUTES
+                )
+            ),
+        )
+    try:
+        hash(value)
+    except TypeError:
+        raise _Unfingerprintable()
+    return (type(value), value)
+
+
+class ISchemaCache(Interface):
+    """
+    Interface for a cache of schemas generated from dictionaries.
+
+    """
+
+    def get(fields): ...
+
+
+@implementer(ISchemaCache)
+class SchemaCache:
+    """
+    Intern schemas generated from dictionaries, so that structurally
+    identical dictionaries share one schema class and instance.
+
+    """
+
+    def __init__(self):
+        self.schemas = dict()
+
+    def get(self, fields):
+        key = fingerprint(fields)
+        if key is None:
+            return Schema.from_dict(fields)()
+        try:
+            return self.schemas[key]
+        except KeyError:
+            schema = self.schemas[key] = Schema.from_dict(fields)()
+            return schema
@@ -0,0 +1,144 @@
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+DELIMITERS = frozenset(" \t\n\r,]")
+
+# The longest token which may be cut off by the end of the buffer, such as
+# `-Infinity` or a `\uXXXX` escape, and so fail to decode until more is read.
+MAX_TOKEN = 9
+
+
+def _dumps(obj):
+    return json.dumps(obj).encode("utf-8")
+
+
+def iter_json_array(items, dump, chunk_size=CHUNK_SIZE, dumps=_dumps):
+    """
+    Serialize an iterable of objects as a JSON array, yielding chunks of bytes.
+
+    Each item is passed through `dump` and encoded to bytes with `dumps`
+    individually, so only one item and the pending chunk are held in memory
+    at a time.  Chunks are flushed once they reach `chunk_size` bytes.
+
+    """
+    chunk = bytearray(b"[")
+    separator = b""
+    for item in items:
+        chunk += separator
+        chunk += dumps(dump(item))
+        separator = b", "
+        if len(chunk) >= chunk_size:
+            yield bytes(chunk)
+            chunk.clear()
+    chunk += b"]"
+    yield bytes(chunk)
+
+
+class _Reader:
+    """
+    Incrementally decode a UTF-8 byte stream into a text buffer.
+
+    """
+
+    def __init__(self, fh, chunk_size):
+        self.fh = fh
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Read another chunk into the buffer, discarding anything already
+        consumed.  Returns false if the stream is exhausted.
+
+        """
+        if self.eof:
+            return False
+        chunk = self.fh.read(self.chunk_size)
+        self.eof = not chunk
+        self.buffer = self.buffer[self.pos :] + self.decoder.decode(
+            chunk, final=self.eof
+        )
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character, or an empty string at
+        the end of the stream.
+
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self.fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, chars):
+        char = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                "Expecting one of " + ", ".join(repr(c) for c in chars),
+                self.buffer,
+                self.pos,
+            )
+        self.pos += 1
+        return char
+
+    def truncated(self, error):
+        """
+        Return true if a decoding error may be caused by the end of the
+        buffer rather than by invalid JSON.
+
+        """
+        return (
+            error.msg.startswith("Unterminated string")
+            or len(self.buffer) - error.pos <= MAX_TOKEN
+        )
+
+    def value(self, decoder):
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as error:
+                # Only read more if the error may be caused by the value being
+                # cut off, so that invalid values are rejected early.
+                if not self.truncated(error) or not self.fill():
+                    raise
+                continue
+            # A number may be cut off by the end of the buffer, so only accept
+            # a value once we can see what follows it.
+            if self.buffer[end : end + 1] in DELIMITERS or not self.fill():
+                self.pos = end
+                return value
+
+
+def iter_json_array_items(fh, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally parse a JSON array from a file-like object of UTF-8 bytes,
+    yielding each item as it is decoded.
+
+    Raises `TypeError` if the document is not an array and
+    `json.JSONDecodeError` if it is malformed.
+
+    """
+    reader = _Reader(fh, chunk_size)
+    decoder = json.JSONDecoder()
+    if reader.peek() != "[":
+        raise TypeError("JSON document is not an array.")
+    reader.pos += 1
+    if reader.peek() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.value(decoder)
+            if reader.expect(",]") == "]":
+                break
+    if reader.peek():
+        raise json.JSONDecodeError("Extra data", reader.buffer, reader.pos)
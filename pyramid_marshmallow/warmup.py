@@ -0,0 +1,105 @@
+import time
+import tracemalloc
+from collections import namedtuple
+
+from marshmallow import fields
+
+from . import process_schema
+from .metrics import view_name
+
+SchemaReport = namedtuple(
+    "SchemaReport",
+    [
+        "schema",  # The dotted name of the schema class.
+        "views",  # The views using the schema and the option, e.g. "marshal".
+        "duration",  # Seconds spent warming the schema.
+        "memory",  # Bytes allocated while warming the schema.
+        "nested",  # The number of nested schemas resolved.
+    ],
+)
+
+
+def warm_marshmallow_schemas(config):
+    """
+    Commit the configuration and resolve every schema used by the
+    `validate` and `marshal` options of the application's views, including
+    nested schemas, which Marshmallow otherwise resolves on first use.
+    Returns a list of :class:`SchemaReport`, one for each schema.
+
+    """
+    config.commit()
+    registry = config.registry
+    schemas = dict()
+    for item in registry.introspector.get_category("views"):
+        intr = item["introspectable"]
+        for option in ("validate", "marshal"):
+            raw = intr.get(option)
+            if raw is None:
+                continue
+            schema = process_schema(raw, registry)
+            info = _ViewInfo(intr)
+            _, views = schemas.setdefault(id(schema), (schema, []))
+            views.append(f"{view_name(info)} ({option})")
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        return [_warm(schema, views) for schema, views in schemas.values()]
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+
+class _ViewInfo:
+    """
+    Adapts a view introspectable to the view info expected by `view_name`.
+
+    """
+
+    def __init__(self, intr):
+        self.options = {"route_name": intr["route_name"]}
+        self.original_view = intr["callable"]
+
+
+def _warm(schema, views):
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    nested = _resolve(schema, frozenset())
+    duration = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] - before
+    cls = type(schema)
+    return SchemaReport(
+        schema=f"{cls.__module__}.{cls.__qualname__}",
+        views=views,
+        duration=duration,
+        memory=memory,
+        nested=nested,
+    )
+
+
+def _resolve(schema, seen):
+    """
+    Resolve the nested schemas of a schema, returning how many there are.
+    Recursive schemas are resolved to the first level of recursion.
+
+    """
+    if type(schema) in seen:
+        return 0
+    seen = seen | {type(schema)}
+    count = 0
+    for field in schema.fields.values():
+        count += _resolve_field(field, seen)
+    return count
+
+
+def _resolve_field(field, seen):
+    if isinstance(field, fields.Nested):
+        return 1 + _resolve(field.schema, seen)
+    elif isinstance(field, fields.List):
+        return _resolve_field(field.inner, seen)
+    elif isinstance(field, fields.Tuple):
+        return sum(_resolve_field(inner, seen) for inner in field.tuple_fields)
+    elif isinstance(field, fields.Dict) and field.value_field is not None:
+        return _resolve_field(field.value_field, seen)
+    return 0
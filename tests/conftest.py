@@ -1 +1,17 @@
+from types import SimpleNamespace
+
+from pyramid.registry import Registry
+
 pytest_plugins = ["sampleapp"]
+
+
+def make_info(settings=None, **options):
+    """
+    Create a stand-in for the view info passed to view derivers.
+
+    """
+    return SimpleNamespace(
+        options=options,
+        settings=dict(settings or {}),
+        registry=Registry("testing"),
+    )
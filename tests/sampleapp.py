@@ -108,6 +108,14 @@ def list():
     }
 
 
+def stream(request):
+    for i in range(3):
+        yield {
+            "title": f"Volume {i + 1}",
+            "release_date": Date(1971, 12, 17),
+        }
+
+
 def like():
     """
     Indicate that you like an album.
@@ -169,6 +177,15 @@ def config():
             renderer="json",
         )
 
+        # Streaming
+        config.add_route("stream", "/stream")
+        config.add_view(
+            stream,
+            route_name="stream",
+            marshal=AlbumSchema(many=True),
+            marshal_stream=True,
+        )
+
         # Traversal
         config.set_root_factory(Root)
         config.add_view(hello_world, context=AlbumContainer, name="hello")
@@ -0,0 +1,175 @@
+import asyncio
+import threading
+
+import pytest
+from marshmallow import Schema, ValidationError, fields, post_load
+from pyramid.config import Configurator
+from webtest import TestApp as WebTestApp
+
+from pyramid_marshmallow.aio import run_awaitable, set_event_loop
+
+
+class AlbumSchema(Schema):
+    title = fields.Str(required=True)
+    year = fields.Int()
+
+
+async def echo(request):
+    await asyncio.sleep(0)
+    return {"title": request.data["title"], "year": 1971, "label": "RCA"}
+
+
+class ThreadSchema(Schema):
+    title = fields.Str()
+
+    @post_load
+    def record_thread(self, data, **kwargs):
+        return dict(data, thread=threading.get_ident())
+
+
+async def loaded(request):
+    await asyncio.sleep(0)
+    data = request.data
+    if not isinstance(data, dict):
+        data = list(data)[0]
+    return {"thread": data["thread"], "loop": threading.get_ident()}
+
+
+async def plain(request):
+    await asyncio.sleep(0)
+    return {"loop": id(asyncio.get_running_loop())}
+
+
+async def stream(request):
+    for title in ("Hunky Dory", "Low"):
+        await asyncio.sleep(0)
+        yield {"title": title, "year": 1971}
+
+
+class AlbumView:
+    def __init__(self, request):
+        self.request = request
+
+    async def get(self):
+        await asyncio.sleep(0)
+        return {"title": "Low", "year": 1977}
+
+
+@pytest.fixture
+def async_app():
+    with Configurator() as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("echo", "/echo")
+        config.add_view(
+            echo,
+            route_name="echo",
+            renderer="json",
+            validate=AlbumSchema(),
+            marshal=AlbumSchema(),
+        )
+        for name, options in [
+            ("eager", {}),
+            ("lazy", {"validate_lazy": True}),
+            ("streamed", {"validate_stream": True}),
+        ]:
+            config.add_route(name, "/" + name)
+            config.add_view(
+                loaded,
+                route_name=name,
+                renderer="json",
+                validate=ThreadSchema(many=name == "streamed"),
+                **options,
+            )
+        config.add_route("plain", "/plain")
+        config.add_view(plain, route_name="plain", renderer="json")
+        config.add_route("stream", "/stream")
+        config.add_view(
+            stream,
+            route_name="stream",
+            marshal=AlbumSchema(many=True),
+            marshal_stream=True,
+        )
+        config.add_route("class", "/class")
+        config.add_view(
+            AlbumView,
+            attr="get",
+            route_name="class",
+            renderer="json",
+            marshal=AlbumSchema(),
+        )
+        return WebTestApp(config.make_wsgi_app())
+
+
+def test_async_view(async_app):
+    r = async_app.post_json("/echo", {"title": "Hunky Dory"})
+    assert r.json == {"title": "Hunky Dory", "year": 1971}
+
+
+def test_async_view_invalid(async_app):
+    with pytest.raises(ValidationError):
+        async_app.post_json("/echo", {})
+
+
+def test_async_view_unmarshalled(async_app):
+    assert "loop" in async_app.get("/plain").json
+
+
+def test_async_view_class(async_app):
+    assert async_app.get("/class").json == {"title": "Low", "year": 1977}
+
+
+def test_async_generator_stream(async_app):
+    assert async_app.get("/stream").json == [
+        {"title": "Hunky Dory", "year": 1971},
+        {"title": "Low", "year": 1971},
+    ]
+
+
+def test_event_loop(async_app):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        set_event_loop(async_app.app.registry, loop)
+        assert async_app.get("/plain").json == {"loop": id(loop)}
+        assert async_app.post_json("/echo", {"title": "Low"}).json == {
+            "title": "Low",
+            "year": 1971,
+        }
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_event_loop_loading(async_app):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        set_event_loop(async_app.app.registry, loop)
+        r = async_app.post_json("/eager", {"title": "Low"})
+        assert r.json["loop"] == thread.ident
+        assert r.json["thread"] == threading.get_ident()
+        # Lazy and streamed data is loaded as the coroutine reads it, so on
+        # the event loop.
+        r = async_app.post_json("/lazy", {"title": "Low"})
+        assert r.json["thread"] == thread.ident
+        r = async_app.post_json("/streamed", [{"title": "Low"}])
+        assert r.json["thread"] == thread.ident
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+def test_run_awaitable_in_loop(async_app):
+    async def main():
+        coroutine = asyncio.sleep(0)
+        try:
+            run_awaitable(coroutine, async_app.app.registry)
+        finally:
+            coroutine.close()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
@@ -0,0 +1,260 @@
+from datetime import date as Date
+from types import SimpleNamespace
+
+import pytest
+from marshmallow import (
+    EXCLUDE,
+    INCLUDE,
+    Schema,
+    ValidationError,
+    fields,
+    post_dump,
+    post_load,
+    validate,
+)
+
+from pyramid_marshmallow import process_schema
+from pyramid_marshmallow.compiler import compile_dumper, compile_loader
+
+
+class ArtistSchema(Schema):
+    name = fields.Str(required=True)
+    born = fields.Int(data_key="yearBorn")
+
+
+class AlbumSchema(Schema):
+    title = fields.Str(required=True, validate=validate.Length(max=20))
+    release_date = fields.Date(allow_none=True)
+    tracks = fields.Int(load_default=10)
+    explicit = fields.Bool(attribute="meta.explicit")
+    artists = fields.List(fields.Nested(ArtistSchema()))
+    remastered = fields.Bool(truthy={"yes"}, falsy={"no"})
+
+
+class HookSchema(Schema):
+    title = fields.Str()
+
+    @post_load
+    def upper(self, data, **kwargs):
+        return {"title": data["title"].upper()}
+
+
+LOAD_CASES = [
+    {"title": "Hunky Dory"},
+    {
+        "title": "Hunky Dory",
+        "release_date": "1971-12-17",
+        "tracks": 11,
+        "explicit": False,
+        "artists": [{"name": "Bowie", "yearBorn": 1947}],
+    },
+    {"title": "Hunky Dory", "release_date": None, "tracks": "11"},
+    {"title": 1},
+    {"title": "x" * 21},
+    {"title": "Hunky Dory", "release_date": "1971-14-17"},
+    {"title": "Hunky Dory", "artists": [{"yearBorn": "nope"}]},
+    {"title": "Hunky Dory", "label": "RCA"},
+    {"release_date": None},
+    {"title": None},
+    {"title": "Hunky Dory", "tracks": True},
+    {"title": "Hunky Dory", "remastered": True},
+    {"title": "Hunky Dory", "remastered": "yes"},
+    ["not", "a", "dict"],
+    "string",
+]
+
+
+def _load_outcome(load, data):
+    try:
+        return "ok", load(data)
+    except ValidationError as err:
+        return "error", err.messages, err.valid_data
+
+
+@pytest.mark.parametrize("data", LOAD_CASES)
+@pytest.mark.parametrize("unknown", [None, EXCLUDE, INCLUDE])
+def test_compile_loader_parity(data, unknown):
+    kwargs = {"unknown": unknown} if unknown else {}
+    schema = AlbumSchema(**kwargs)
+    load = compile_loader(schema)
+    assert load != schema.load
+    assert _load_outcome(load, data) == _load_outcome(schema.load, data)
+
+
+@pytest.mark.parametrize("data", LOAD_CASES)
+def test_compile_loader_many_parity(data):
+    schema = AlbumSchema(many=True)
+    load = compile_loader(schema)
+    for payload in ([data, data], data):
+        assert _load_outcome(load, payload) == _load_outcome(
+            schema.load, payload
+        )
+
+
+def test_compile_loader_result():
+    load = compile_loader(AlbumSchema())
+    assert load(
+        {
+            "title": "Hunky Dory",
+            "release_date": "1971-12-17",
+            "explicit": True,
+        }
+    ) == {
+        "title": "Hunky Dory",
+        "release_date": Date(1971, 12, 17),
+        "tracks": 10,
+        "meta": {"explicit": True},
+    }
+
+
+def test_compile_loader_unsupported():
+    schema = HookSchema()
+    assert compile_loader(schema) == schema.load
+    schema = AlbumSchema(partial=True)
+    assert compile_loader(schema) == schema.load
+
+
+class DumpSchema(Schema):
+    title = fields.Str(data_key="name")
+    tracks = fields.Int(dump_default=10)
+    length = fields.Float(as_string=True)
+    explicit = fields.Bool(attribute="meta.explicit")
+    extra = fields.Raw()
+    kind = fields.Function(lambda obj: type(obj).__name__)
+    artists = fields.List(fields.Nested(ArtistSchema()))
+    lead = fields.Nested(ArtistSchema(only=("name",)), allow_none=True)
+    credits = fields.Nested(ArtistSchema, many=True)
+
+
+DUMP_CASES = [
+    {"title": "Hunky Dory"},
+    {
+        "title": "Hunky Dory",
+        "tracks": 11,
+        "length": 41.5,
+        "meta": {"explicit": False},
+        "extra": {"label": "RCA"},
+        "artists": [{"name": "Bowie", "born": 1947}],
+        "lead": {"name": "Bowie", "born": 1947},
+        "credits": [{"name": "Ronson"}, {"name": "Wakeman"}],
+    },
+    {"title": 1, "tracks": "11", "length": 41, "lead": None, "extra": None},
+]
+
+
+@pytest.mark.parametrize("obj", DUMP_CASES)
+def test_compile_dumper_parity(obj):
+    schema = DumpSchema()
+    dump = compile_dumper(schema)
+    assert dump != schema.dump
+    assert dump(obj) == schema.dump(obj)
+    assert dump([obj, obj], many=True) == schema.dump([obj, obj], many=True)
+
+
+def test_compile_dumper_many():
+    schema = DumpSchema(many=True)
+    dump = compile_dumper(schema)
+    assert dump(DUMP_CASES) == schema.dump(DUMP_CASES)
+
+
+def test_compile_dumper_unsupported():
+    schema = HookSchema()
+    assert compile_dumper(schema) == schema.dump
+
+
+def _sample(field):
+    if isinstance(field, fields.Nested):
+        value = _sample_obj(field.schema)
+        return [value, value] if field.schema.many or field.many else value
+    elif isinstance(field, fields.List):
+        return [_sample(field.inner), _sample(field.inner)]
+    elif isinstance(field, fields.Date):
+        return Date(1971, 12, 17)
+    else:
+        return "Hunky Dory"
+
+
+def _sample_obj(schema):
+    return {name: _sample(field) for name, field in schema.fields.items()}
+
+
+def _app_schemas(config):
+    introspector = config.registry.introspector
+    for item in introspector.get_category("views"):
+        view = item["introspectable"]
+        for option in ("validate", "marshal"):
+            if view.get(option) is not None:
+                yield process_schema(view[option])
+
+
+def test_compile_dumper_sampleapp_parity(config):
+    schemas = list(_app_schemas(config))
+    assert schemas
+    for schema in schemas:
+        dump = compile_dumper(schema)
+        full = _sample_obj(schema)
+        nulls = dict.fromkeys(full)
+        for obj in (full, nulls, SimpleNamespace(**full)):
+            if schema.many:
+                obj = [obj, obj]
+            assert dump(obj) == schema.dump(obj)
+
+
+def test_compile_dumper_many_columnar():
+    schema = DumpSchema(many=True)
+    dump = compile_dumper(schema)
+    objs = DUMP_CASES * 3
+    expected = schema.dump(objs)
+    assert dump(objs) == expected
+    assert [list(row) for row in dump(objs)] == [list(row) for row in expected]
+    assert dump(iter(objs)) == expected
+    assert dump([]) == []
+
+
+class CountSchema(Schema):
+    name = fields.Str()
+
+    @post_dump(pass_many=True)
+    def count(self, data, many, **kwargs):
+        return {"count": len(data) if many else 1}
+
+
+def test_compile_dumper_many_nested_hooks():
+    # Nested schemas with processors must see each item's list separately.
+    schema = Schema.from_dict(
+        {"credits": fields.Nested(CountSchema, many=True)}
+    )(many=True)
+    objs = [{"credits": [{"name": "a"}]}, {"credits": [{}, {}, {}]}]
+    assert compile_dumper(schema)(objs) == [
+        {"credits": {"count": 1}},
+        {"credits": {"count": 3}},
+    ]
+
+
+class NodeSchema(Schema):
+    name = fields.Str()
+    children = fields.Nested("NodeSchema", many=True)
+
+
+class CommentSchema(Schema):
+    text = fields.Str()
+    replies = fields.Nested(lambda: CommentSchema(), many=True)
+
+
+@pytest.mark.parametrize(
+    "schema, obj",
+    [
+        (
+            NodeSchema(),
+            {"name": "a", "children": [{"name": "b", "children": []}]},
+        ),
+        (
+            CommentSchema(),
+            {"text": "a", "replies": [{"text": "b", "replies": [{}]}]},
+        ),
+    ],
+)
+def test_compile_dumper_recursive(schema, obj):
+    dump = compile_dumper(schema)
+    assert dump(obj) == schema.dump(obj)
+    assert dump([obj, obj], many=True) == schema.dump([obj, obj], many=True)
@@ -0,0 +1,156 @@
+import pytest
+from conftest import make_info
+from marshmallow import Schema, ValidationError, fields, validates_schema
+from pyramid.testing import DummyRequest
+
+from pyramid_marshmallow import view_validator
+from pyramid_marshmallow.failfast import fail_fast_loader
+
+
+class CountingInt(fields.Int):
+    calls = 0
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        CountingInt.calls += 1
+        return super()._deserialize(value, attr, data, **kwargs)
+
+
+class TrackSchema(Schema):
+    title = fields.Str(required=True)
+    length = CountingInt()
+
+
+class AlbumSchema(Schema):
+    title = fields.Str(required=True)
+    year = fields.Int()
+    ids = fields.List(CountingInt())
+    tracks = fields.Nested(TrackSchema, many=True)
+    bonus = fields.List(fields.Nested(TrackSchema))
+
+    @validates_schema
+    def check(self, data, **kwargs):
+        raise ValidationError("Schema validator ran.")
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    CountingInt.calls = 0
+
+
+def test_fail_fast_items():
+    load = fail_fast_loader(TrackSchema(many=True), 3)
+    with pytest.raises(ValidationError) as exc_info:
+        load([{"length": "x"}] * 1000)
+    assert exc_info.value.messages == {
+        0: {
+            "title": ["Missing data for required field."],
+            "length": ["Not a valid integer."],
+        },
+        1: {"title": ["Missing data for required field."]},
+    }
+    assert CountingInt.calls == 1
+
+
+def test_fail_fast_nested():
+    load = fail_fast_loader(AlbumSchema(), 2)
+    data = {
+        "title": "Low",
+        "tracks": [{"title": "Warszawa"}, {"title": 1}, {"title": 2}],
+        "bonus": [{"title": 3}, {"title": 4}],
+        "year": "x",
+    }
+    with pytest.raises(ValidationError) as exc_info:
+        load(data)
+    assert exc_info.value.messages == {
+        "year": ["Not a valid integer."],
+        "tracks": {1: {"title": ["Not a valid string."]}},
+    }
+
+    data["tracks"] = []
+    with pytest.raises(ValidationError) as exc_info:
+        load(data)
+    assert exc_info.value.messages == {
+        "year": ["Not a valid integer."],
+        "bonus": {0: {"title": ["Not a valid string."]}},
+    }
+
+
+def test_fail_fast_scalar_list():
+    load = fail_fast_loader(AlbumSchema(), 3)
+    with pytest.raises(ValidationError) as exc_info:
+        load({"title": "Low", "ids": [1] + ["x"] * 1000})
+    assert exc_info.value.messages == {
+        "ids": {i: ["Not a valid integer."] for i in (1, 2, 3)},
+    }
+    assert CountingInt.calls == 4
+
+    with pytest.raises(ValidationError) as exc_info:
+        load({"title": 1, "ids": [1, "x", 2]})
+    assert exc_info.value.messages == {
+        "title": ["Not a valid string."],
+        "ids": {1: ["Not a valid integer."]},
+    }
+
+
+def test_fail_fast_under_budget():
+    schema = AlbumSchema()
+    load = fail_fast_loader(AlbumSchema(), 10)
+    data = {"title": 1, "tracks": [{"title": 2}]}
+    with pytest.raises(ValidationError) as expected:
+        schema.load(data)
+    with pytest.raises(ValidationError) as exc_info:
+        load(data)
+    assert exc_info.value.messages == expected.value.messages
+    assert "_schema" not in expected.value.messages
+
+    data = {"title": "Low", "tracks": [{"title": "Warszawa", "length": 6}]}
+    load = fail_fast_loader(TrackSchema(many=True), 1)
+    assert load(data["tracks"]) == data["tracks"]
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_validate_max_errors(compiled):
+    schema = TrackSchema(many=True)
+    view = view_validator(
+        lambda context, request: request.data,
+        make_info(
+            validate=schema,
+            validate_max_errors=1,
+            validate_compiled=compiled,
+        ),
+    )
+    request = DummyRequest(method="POST")
+    request.json_body = [{"title": "Low", "length": 1}]
+    assert view(None, request) == [{"title": "Low", "length": 1}]
+    request.json_body = [{"title": 1}] * 100
+    with pytest.raises(ValidationError) as exc_info:
+        view(None, request)
+    assert exc_info.value.messages == {0: {"title": ["Not a valid string."]}}
+
+    # The view's schema isn't affected.
+    with pytest.raises(ValidationError) as exc_info:
+        schema.load(request.json_body)
+    assert len(exc_info.value.messages) == 100
+
+
+class SecretTrackSchema(TrackSchema):
+    secret = fields.Str()
+
+
+class SecretAlbumSchema(Schema):
+    tracks = fields.Nested(SecretTrackSchema, many=True)
+
+
+def test_validate_max_errors_nested_exclude():
+    schema = SecretAlbumSchema(exclude=["tracks.secret"])
+    view = view_validator(
+        lambda context, request: request.data,
+        make_info(validate=schema, validate_max_errors=5),
+    )
+    request = DummyRequest(method="POST")
+    request.json_body = {"tracks": [{"title": "Low", "secret": "x"}]}
+    with pytest.raises(ValidationError) as exc_info:
+        view(None, request)
+    assert exc_info.value.messages == {
+        "tracks": {0: {"secret": ["Unknown field."]}}
+    }
@@ -0,0 +1,104 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+import yaml
+from pyramid.config import Configurator
+
+from pyramid_marshmallow.openapi.generate import (
+    generate_manifest,
+    load_manifest,
+    write_atomic,
+)
+from pyramid_marshmallow.openapi.spec import create_spec
+
+SETTINGS = {
+    "openapi.title": "Sample",
+    "openapi.version": "1.0",
+    "openapi.openapi_version": "3.0.2",
+}
+
+
+def view(request):
+    return {}
+
+
+def make_app():
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        for zone in ("one", "two"):
+            config.add_route(zone, "/" + zone)
+            config.add_view(
+                view,
+                route_name=zone,
+                renderer="json",
+                api_zone=zone,
+            )
+        return config.make_wsgi_app()
+
+
+def make_args(manifest, processes=None):
+    return SimpleNamespace(
+        app="test_generate:make_app()",
+        ini=None,
+        manifest=str(manifest),
+        processes=processes,
+    )
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "spec.json"
+    path.write_bytes(b"old")
+    write_atomic(str(path), b"new")
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["spec.json"]
+
+
+def test_load_manifest(tmp_path):
+    manifest = tmp_path / "manifest.yaml"
+    manifest.write_text("- output: spec.json\n- {zone: one, format: yaml}\n")
+    with pytest.raises(ValueError):
+        load_manifest(str(manifest))
+    manifest.write_text("- {output: spec.txt, format: txt}\n")
+    with pytest.raises(ValueError):
+        load_manifest(str(manifest))
+    manifest.write_text("- output: spec.json\n")
+    assert load_manifest(str(manifest)) == [
+        {"zone": None, "merge": None, "format": "json", "output": "spec.json"}
+    ]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_generate_manifest(tmp_path, processes):
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text("info:\n  description: Merged\n")
+    manifest = tmp_path / "manifest.json"
+    jobs = [
+        {"output": str(tmp_path / "all.json")},
+        {"zone": "one", "output": str(tmp_path / "one.json")},
+        {
+            "zone": "two",
+            "merge": str(mergefile),
+            "output": str(tmp_path / "two.json"),
+        },
+        {
+            "zone": "two",
+            "format": "yaml",
+            "output": str(tmp_path / "two.yaml"),
+        },
+        {"format": "html", "output": str(tmp_path / "all.html")},
+    ]
+    manifest.write_text(json.dumps(jobs))
+    generate_manifest(make_args(manifest, processes))
+
+    registry = make_app().registry
+    for name, zone in [("all", None), ("one", "one")]:
+        spec = json.loads((tmp_path / f"{name}.json").read_text())
+        assert spec == create_spec(registry, zone=zone)
+    spec = json.loads((tmp_path / "two.json").read_text())
+    assert spec == create_spec(registry, zone="two", merge=str(mergefile))
+    assert spec["info"]["description"] == "Merged"
+    spec = yaml.safe_load((tmp_path / "two.yaml").read_text())
+    assert spec == create_spec(registry, zone="two")
+    assert "<!DOCTYPE html>" in (tmp_path / "all.html").read_text()
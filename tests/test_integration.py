@@ -53,3 +53,15 @@ def test_marshal_integration(app):
         "title": "Hunky Dory",
         "release_date": "1971-12-17",
     }
+
+
+def test_marshal_stream_integration(app):
+    r = app.get("/stream")
+    assert r.content_type == "application/json"
+    assert r.json == [
+        {
+            "title": f"Volume {i + 1}",
+            "release_date": "1971-12-17",
+        }
+        for i in range(3)
+    ]
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+import webtest
+from pyramid.config import Configurator
+
+from pyramid_marshmallow.jsonbackend import (
+    StdlibBackend,
+    get_backend,
+    settings_backend,
+)
+
+DOC = {"b": [1, 2.5, None, True], "a": {"name": "Hunky Dory é"}}
+
+
+def test_stdlib_backend():
+    backend = get_backend()
+    assert isinstance(backend, StdlibBackend)
+    assert backend.dumps(DOC) == json.dumps(DOC).encode("utf-8")
+    assert backend.dumps(DOC, indent=True, sort_keys=True) == json.dumps(
+        DOC, indent=2, sort_keys=True
+    ).encode("utf-8")
+    assert backend.loads(backend.dumps(DOC)) == DOC
+
+
+@pytest.mark.parametrize("name", ["orjson", "msgspec"])
+def test_backend(name):
+    pytest.importorskip(name)
+    backend = get_backend(name)
+    assert backend.name == name
+    assert json.loads(backend.dumps(DOC)) == DOC
+    assert backend.loads(json.dumps(DOC).encode("utf-8")) == DOC
+    assert json.loads(backend.dumps(DOC, indent=True, sort_keys=True)) == DOC
+    with pytest.raises(ValueError):
+        backend.loads(b"[1, 2")
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_backend_non_str_keys(name):
+    pytest.importorskip(name)
+    backend = get_backend(name)
+    doc = {"responses": {404: {"description": "Not found"}}}
+    expected = {"responses": {"404": {"description": "Not found"}}}
+    assert json.loads(backend.dumps(doc)) == expected
+    assert json.loads(backend.dumps(doc, sort_keys=True)) == expected
+
+
+def test_auto_backend():
+    assert get_backend("auto").name in ("orjson", "msgspec", "json")
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        get_backend("pickle")
+
+
+def test_settings_backend():
+    assert settings_backend({}) is get_backend("json")
+    assert settings_backend(None) is get_backend("json")
+    assert settings_backend(
+        {"marshmallow.json_backend": "auto"}
+    ) is get_backend("auto")
+
+
+def test_json_renderer():
+    def view(request):
+        return DOC
+
+    with Configurator(settings={"marshmallow.json_backend": "auto"}) as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("doc", "/doc")
+        config.add_view(view, route_name="doc", renderer="marshmallow_json")
+        app = webtest.TestApp(config.make_wsgi_app())
+    r = app.get("/doc")
+    assert r.content_type == "application/json"
+    assert r.json == DOC
@@ -0,0 +1,211 @@
+import json
+import time
+
+import pytest
+from conftest import make_info
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate
+from pyramid.exceptions import ConfigurationError
+from pyramid.request import Request
+
+from pyramid_marshmallow import view_validator
+from pyramid_marshmallow.limits import (
+    LimitExceeded,
+    Limits,
+    check_structure,
+    schema_limits,
+    view_limits,
+)
+
+
+class TrackSchema(Schema):
+    title = fields.Str()
+    artists = fields.List(fields.Str(), validate=validate.Length(max=5))
+
+
+class AlbumSchema(Schema):
+    title = fields.Str()
+    year = fields.Int()
+    tracks = fields.Nested(
+        TrackSchema,
+        many=True,
+        validate=validate.Length(max=20),
+    )
+
+
+class TreeSchema(Schema):
+    name = fields.Str()
+    children = fields.List(fields.Nested(lambda: TreeSchema()))
+
+
+def make_request(body):
+    return Request.blank(
+        "/",
+        method="POST",
+        body=json.dumps(body).encode(),
+        content_type="application/json",
+    )
+
+
+def test_schema_limits():
+    assert schema_limits(AlbumSchema()) == Limits(None, 4, 20, 3)
+    assert schema_limits(AlbumSchema(many=True)) == Limits(None, 5, None, 3)
+    assert schema_limits(TreeSchema()) == Limits(None, None, None, 2)
+    assert schema_limits(AlbumSchema(unknown=EXCLUDE)) == Limits(
+        None, None, None, None
+    )
+    schema = Schema.from_dict({"meta": fields.Dict()})()
+    assert schema_limits(schema) == Limits(None, None, None, None)
+
+
+class JSONField(fields.Raw):
+    pass
+
+
+class TrimmedString(fields.Str):
+    def _deserialize(self, value, attr, data, **kwargs):
+        return super()._deserialize(value, attr, data, **kwargs).strip()
+
+
+class CustomField(fields.Field):
+    pass
+
+
+@pytest.mark.parametrize(
+    "field", [JSONField(), CustomField(), TrimmedString()]
+)
+def test_schema_limits_unknown_fields(field):
+    schema = Schema.from_dict({"title": fields.Str(), "meta": field})()
+    assert schema_limits(schema) == Limits(None, None, None, None)
+
+
+def test_schema_limits_pluck():
+    schema = Schema.from_dict(
+        {"album": fields.Pluck(TrackSchema, "artists")}
+    )()
+    assert schema_limits(schema) == Limits(None, 2, 5, 1)
+
+
+def test_schema_limits_scalars():
+    schema = Schema.from_dict({"title": fields.Str(), "id": fields.UUID()})()
+    assert schema_limits(schema) == Limits(None, 1, None, 2)
+    assert schema_limits(Schema.from_dict({})()) == Limits(None, 1, None, None)
+
+
+def test_view_limits():
+    schema = AlbumSchema()
+    assert view_limits(schema, {}) is None
+    settings = {"marshmallow.max_depth": "10", "marshmallow.max_keys": "50"}
+    assert view_limits(schema, settings) == Limits(None, 10, None, 50)
+    assert view_limits(
+        schema, settings, {"max_keys": 5, "derive": True}
+    ) == Limits(None, 10, 20, 5)
+    settings["marshmallow.derive_limits"] = "true"
+    assert view_limits(schema, settings) == Limits(None, 10, 20, 50)
+    with pytest.raises(ConfigurationError):
+        view_limits(schema, {}, {"max_items": 5})
+
+
+def nest(value, depth):
+    for _ in range(depth):
+        value = [[value]]
+    return value
+
+
+@pytest.mark.parametrize(
+    "body, limits",
+    [
+        ([[[1]]], Limits(None, 2, None, None)),
+        ([1, 2, 3], Limits(None, None, 2, None)),
+        ([{"a": [1, 2, 3]}], Limits(None, None, 2, None)),
+        ({"a": 1, "b": 2, "c": 3}, Limits(None, None, None, 2)),
+        # Deeper than the levels stripped with regular expressions.
+        (nest([1], 20), Limits(None, 19, None, None)),
+        (nest([1, 2, 3], 20), Limits(None, None, 2, None)),
+        (nest([{"a": 1, "b": 2, "c": 3}, 4], 20), Limits(None, None, None, 2)),
+    ],
+)
+def test_check_structure_exceeded(body, limits):
+    with pytest.raises(LimitExceeded):
+        check_structure(json.dumps(body).encode(), limits)
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        [[1, 2], {"a": 1, "b": [1, 2]}],
+        ["[[[,,,{{{", {"a": '"[[[', "b": "\\"}],
+        [],
+        {},
+        "string",
+    ],
+)
+def test_check_structure_ok(body):
+    check_structure(json.dumps(body).encode(), Limits(None, 3, 2, 2))
+    # The same, nested deeper than the levels stripped with regular
+    # expressions.
+    check_structure(
+        json.dumps(nest(body, 20)).encode(), Limits(None, 43, 2, 2)
+    )
+
+
+def test_check_structure_deep():
+    # Without a depth limit, the scan must still be linear in the size of
+    # the body.
+    body = b"[" * 100_000 + b"]" * 100_000
+    start = time.perf_counter()
+    check_structure(body, Limits(None, None, 10, None))
+    assert time.perf_counter() - start < 1
+    with pytest.raises(LimitExceeded):
+        check_structure(body, Limits(None, 99_999, None, None))
+    check_structure(body, Limits(None, 100_000, None, None))
+
+
+def test_validate_limits():
+    view = view_validator(
+        lambda context, request: request.data,
+        make_info(
+            validate=AlbumSchema(),
+            validate_limits={"derive": True, "max_bytes": 2000},
+        ),
+    )
+    album = {
+        "title": "Low",
+        "tracks": [{"title": "Warszawa", "artists": ["Bowie", "Eno"]}],
+    }
+    assert view(None, make_request(album)) == album
+
+    album["tracks"] = album["tracks"] * 21
+    with pytest.raises(LimitExceeded) as exc_info:
+        view(None, make_request(album))
+    assert isinstance(exc_info.value, ValidationError)
+    assert exc_info.value.messages == {"_schema": ["Array exceeds 20 items."]}
+
+    album["tracks"] = [{"title": "x" * 2000}]
+    with pytest.raises(LimitExceeded) as exc_info:
+        view(None, make_request(album))
+    assert exc_info.value.messages == {
+        "_schema": ["Request body exceeds 2000 bytes."]
+    }
+
+
+def test_validate_limits_settings():
+    view = view_validator(
+        lambda context, request: request.data,
+        make_info(
+            settings={"marshmallow.max_depth": "2"},
+            validate=AlbumSchema(),
+        ),
+    )
+    assert view(None, make_request({"title": "Low"})) == {"title": "Low"}
+    with pytest.raises(LimitExceeded):
+        view(None, make_request({"tracks": [{"artists": ["Bowie"]}]}))
+
+
+def test_validate_derived_limits_raw():
+    schema = Schema.from_dict({"meta": JSONField()})()
+    view = view_validator(
+        lambda context, request: request.data,
+        make_info(validate=schema, validate_limits={"derive": True}),
+    )
+    body = {"meta": [{"a": [1, 2]}, []]}
+    assert view(None, make_request(body)) == body
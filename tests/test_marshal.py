@@ -1,10 +1,13 @@
+import json
 from datetime import date as Date
-from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
-from marshmallow import Schema, fields
+from conftest import make_info
+from marshmallow import Schema, ValidationError, fields
 from pyramid.httpexceptions import HTTPNoContent
+from pyramid.testing import DummyRequest
+from webob.multidict import MultiDict
 
 from pyramid_marshmallow import view_marshaller
 
@@ -17,10 +20,8 @@ class AlbumSchema(Schema):
 @pytest.fixture
 def wrap_view():
     def wrap(view):
-        info = SimpleNamespace(
-            options={
-                "marshal": AlbumSchema(),
-            }
+        info = make_info(
+            marshal=AlbumSchema(),
         )
         return view_marshaller(view, info)
 
@@ -47,3 +48,191 @@ def test_marshal_http_response(wrap_view):
     view = wrap_view(unwrapped)
     resp = view("context", "request")
     assert isinstance(resp, HTTPNoContent)
+
+
+def test_marshal_compiled():
+    unwrapped = Mock(
+        return_value={
+            "title": "Hunky Dory",
+            "release_date": Date(1971, 12, 17),
+        }
+    )
+    info = make_info(
+        marshal=AlbumSchema(),
+        marshal_compiled=True,
+    )
+    view = view_marshaller(unwrapped, info)
+    assert view("context", "request") == {
+        "title": "Hunky Dory",
+        "release_date": "1971-12-17",
+    }
+
+
+def test_marshal_stream():
+    def unwrapped(context, request):
+        yield {"title": "Hunky Dory", "release_date": Date(1971, 12, 17)}
+        yield {"title": "Low", "release_date": Date(1977, 1, 14)}
+
+    info = make_info(
+        marshal=AlbumSchema(many=True),
+        marshal_stream=True,
+    )
+    view = view_marshaller(unwrapped, info)
+    resp = view("context", "request")
+    assert resp.content_type == "application/json"
+    assert json.loads(b"".join(resp.app_iter)) == [
+        {"title": "Hunky Dory", "release_date": "1971-12-17"},
+        {"title": "Low", "release_date": "1977-01-14"},
+    ]
+
+
+class ArtistSchema(Schema):
+    id = fields.Int()
+    name = fields.Str()
+
+
+class RecordSchema(Schema):
+    id = fields.Int()
+    title = fields.Str()
+    catalog = fields.Str(data_key="catalogNumber")
+    artist = fields.Nested(ArtistSchema)
+    tracks = fields.List(fields.Nested(ArtistSchema))
+
+
+RECORD = {
+    "id": 1,
+    "title": "Hunky Dory",
+    "catalog": "LSP-4623",
+    "artist": {"id": 2, "name": "David Bowie"},
+    "tracks": [{"id": 3, "name": "Changes"}],
+}
+
+
+def make_request(**params):
+    request = DummyRequest(params=params)
+    request.GET = MultiDict(params)
+    return request
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_marshal_fields(compiled):
+    info = make_info(
+        marshal=RecordSchema(),
+        marshal_fields=True,
+        marshal_compiled=compiled,
+    )
+    view = view_marshaller(lambda context, request: RECORD, info)
+    assert view(None, make_request()) == RecordSchema().dump(RECORD)
+    assert view(None, make_request(fields="")) == RecordSchema().dump(RECORD)
+    assert view(None, make_request(fields="title, catalogNumber")) == {
+        "title": "Hunky Dory",
+        "catalogNumber": "LSP-4623",
+    }
+    assert view(None, make_request(fields="id,artist.name,tracks.id")) == {
+        "id": 1,
+        "artist": {"name": "David Bowie"},
+        "tracks": [{"id": 3}],
+    }
+
+
+@pytest.mark.parametrize(
+    "value", ["nope", "catalog", "title.id", "artist.nope"]
+)
+def test_marshal_fields_invalid(value):
+    info = make_info(marshal=RecordSchema(), marshal_fields=True)
+    view = view_marshaller(lambda context, request: RECORD, info)
+    with pytest.raises(ValidationError) as exc:
+        view(None, make_request(fields=value))
+    assert list(exc.value.messages) == ["fields"]
+
+
+def test_marshal_fields_respects_only():
+    info = make_info(marshal=RecordSchema(only=["id"]), marshal_fields=True)
+    view = view_marshaller(lambda context, request: RECORD, info)
+    with pytest.raises(ValidationError):
+        view(None, make_request(fields="title"))
+    assert view(None, make_request(fields="id")) == {"id": 1}
+
+
+class SecretArtistSchema(ArtistSchema):
+    password_hash = fields.Str()
+
+
+class SecretRecordSchema(RecordSchema):
+    artist = fields.Nested(SecretArtistSchema)
+
+
+SECRET_RECORD = dict(
+    RECORD, artist={"id": 2, "name": "David Bowie", "password_hash": "x"}
+)
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_marshal_fields_respects_nested_exclude(compiled):
+    info = make_info(
+        marshal=SecretRecordSchema(exclude=["artist.password_hash"]),
+        marshal_fields=True,
+        marshal_compiled=compiled,
+    )
+    view = view_marshaller(lambda context, request: SECRET_RECORD, info)
+    assert view(None, make_request(fields="id,artist")) == {
+        "id": 1,
+        "artist": {"id": 2, "name": "David Bowie"},
+    }
+    with pytest.raises(ValidationError):
+        view(None, make_request(fields="artist.password_hash"))
+
+
+@pytest.mark.parametrize("compiled", [False, True])
+def test_marshal_fields_respects_nested_only(compiled):
+    info = make_info(
+        marshal=SecretRecordSchema(only=["id", "artist.id", "artist.name"]),
+        marshal_fields=True,
+        marshal_compiled=compiled,
+    )
+    view = view_marshaller(lambda context, request: SECRET_RECORD, info)
+    assert view(None, make_request(fields="artist")) == {
+        "artist": {"id": 2, "name": "David Bowie"},
+    }
+    assert view(None, make_request(fields="id,artist.name")) == {
+        "id": 1,
+        "artist": {"name": "David Bowie"},
+    }
+
+
+def test_marshal_fields_invalid_before_view():
+    view = Mock(return_value=RECORD)
+    info = make_info(marshal=RecordSchema(), marshal_fields=True)
+    wrapped = view_marshaller(view, info)
+    with pytest.raises(ValidationError):
+        wrapped(None, make_request(fields="nope"))
+    view.assert_not_called()
+
+
+def test_marshal_fields_cached(monkeypatch):
+    import pyramid_marshmallow
+
+    calls = []
+    project = pyramid_marshmallow._project
+
+    def spy(schema, only):
+        calls.append(only)
+        return project(schema, only)
+
+    monkeypatch.setattr(pyramid_marshmallow, "_project", spy)
+    info = make_info(marshal=RecordSchema(many=True), marshal_fields=True)
+    view = view_marshaller(lambda context, request: [RECORD], info)
+    for value in ["id,title", "title,id", "id,title", "id"]:
+        view(None, make_request(fields=value))
+    assert calls == [("id", "title"), ("id",)]
+
+
+def test_marshal_fields_stream():
+    info = make_info(
+        marshal=RecordSchema(many=True),
+        marshal_fields=True,
+        marshal_stream=True,
+    )
+    view = view_marshaller(lambda context, request: iter([RECORD]), info)
+    response = view(None, make_request(fields="id"))
+    assert json.loads(b"".join(response.app_iter)) == [{"id": 1}]
@@ -0,0 +1,116 @@
+import socket
+
+import pytest
+import webtest
+from marshmallow import Schema, ValidationError, fields
+from pyramid.config import Configurator
+from pyramid.response import Response
+
+from pyramid_marshmallow.metrics import Measurement, MemorySink, StatsdSink
+
+
+class AlbumSchema(Schema):
+    title = fields.Str(required=True)
+
+
+def echo(request):
+    return request.data
+
+
+def stream(request):
+    return ({"title": str(i)} for i in range(100))
+
+
+def validation_error(context, request):
+    return Response(status=400)
+
+
+@pytest.fixture
+def sink():
+    return MemorySink()
+
+
+@pytest.fixture
+def app(sink):
+    with Configurator() as config:
+        config.include("pyramid_marshmallow")
+        config.set_metrics_sink(sink)
+        config.add_route("echo", "/echo")
+        config.add_view(
+            echo,
+            route_name="echo",
+            validate=AlbumSchema(),
+            marshal=AlbumSchema(),
+            renderer="json",
+        )
+        config.add_route("stream", "/stream")
+        config.add_view(
+            stream,
+            route_name="stream",
+            marshal=AlbumSchema(many=True),
+            marshal_stream=True,
+        )
+        config.add_view(validation_error, context=ValidationError)
+        return webtest.TestApp(config.make_wsgi_app())
+
+
+def test_metrics(app, sink):
+    app.post_json("/echo", {"title": "Hunky Dory"})
+    app.post_json("/echo", {}, status=400)
+    stats = sink.snapshot()
+    assert set(stats) == {("echo", "load"), ("echo", "dump")}
+    load = stats[("echo", "load")]
+    assert load["count"] == 2
+    assert load["errors"] == 1
+    assert load["size"] == len(b'{"title": "Hunky Dory"}') + len(b"{}")
+    assert sum(load["histogram"]) == 2
+    dump = stats[("echo", "dump")]
+    assert dump["count"] == 1
+    assert dump["errors"] == 0
+
+
+def test_metrics_stream(app, sink):
+    r = app.get("/stream")
+    stats = sink.snapshot()
+    assert stats[("stream", "dump")]["count"] == 1
+    assert stats[("stream", "dump")]["size"] == len(r.body)
+
+
+collected = []
+
+
+def collect(measurement):
+    collected.append(measurement)
+
+
+def test_metrics_setting():
+    settings = {"marshmallow.metrics_sink": "test_metrics:collect"}
+    with Configurator(settings=settings) as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("echo", "/echo")
+        config.add_view(
+            echo,
+            route_name="echo",
+            validate=AlbumSchema(),
+            renderer="json",
+        )
+        app = webtest.TestApp(config.make_wsgi_app())
+    del collected[:]
+    app.post_json("/echo", {"title": "Hunky Dory"})
+    assert [(m.view, m.phase, m.error) for m in collected] == [
+        ("echo", "load", False),
+    ]
+
+
+def test_statsd_sink():
+    server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    server.bind(("127.0.0.1", 0))
+    server.settimeout(1)
+    sink = StatsdSink("127.0.0.1", server.getsockname()[1], prefix="app")
+    sink(Measurement("echo", "load", 0.0125, 42, True))
+    assert server.recv(1024).decode().split("\n") == [
+        "app.echo.load.time:12.500|ms",
+        "app.echo.load.size:42|h",
+        "app.echo.load.errors:1|c",
+    ]
+    server.close()
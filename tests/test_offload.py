@@ -0,0 +1,119 @@
+import os
+import signal
+
+import pytest
+from marshmallow import Schema, ValidationError, fields, post_load
+from pyramid.config import Configurator
+from webtest import TestApp as WebTestApp
+
+from pyramid_marshmallow.offload import IOffloadPool, OffloadPool
+
+SETTINGS = {
+    "marshmallow.offload_processes": "1",
+    "marshmallow.offload_threshold": "64",
+    "marshmallow.offload_items": "2",
+}
+
+
+class AlbumSchema(Schema):
+    title = fields.Str(required=True)
+    pid = fields.Function(lambda obj: os.getpid())
+
+    @post_load
+    def add_pid(self, data, **kwargs):
+        data["pid"] = os.getpid()
+        return data
+
+
+def load(request):
+    return {"pid": request.data["pid"]}
+
+
+def dump(request):
+    return [{"title": title} for title in request.GET.getall("title")]
+
+
+@pytest.fixture
+def offload_app():
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("load", "/load")
+        config.add_view(
+            load,
+            route_name="load",
+            renderer="json",
+            validate=AlbumSchema(),
+            validate_offload=True,
+        )
+        config.add_route("dump", "/dump")
+        config.add_view(
+            dump,
+            route_name="dump",
+            renderer="json",
+            marshal=AlbumSchema(many=True),
+            marshal_offload=True,
+        )
+        app = config.make_wsgi_app()
+    yield WebTestApp(app)
+    app.registry.getUtility(IOffloadPool).shutdown()
+
+
+def test_load(offload_app):
+    r = offload_app.post_json("/load", {"title": "Hunky Dory"})
+    assert r.json["pid"] == os.getpid()
+    r = offload_app.post_json("/load", {"title": "Hunky Dory" * 10})
+    assert r.json["pid"] != os.getpid()
+
+
+def test_load_invalid(offload_app):
+    with pytest.raises(ValidationError) as exc_info:
+        offload_app.post_json("/load", {"title": 1, "padding": "x" * 64})
+    assert exc_info.value.messages == {
+        "title": ["Not a valid string."],
+        "padding": ["Unknown field."],
+    }
+
+
+def test_dump(offload_app):
+    r = offload_app.get("/dump", {"title": ["Low"]})
+    assert r.json == [{"title": "Low", "pid": os.getpid()}]
+    r = offload_app.get("/dump", {"title": ["Low", "Heroes"]})
+    assert [item["title"] for item in r.json] == ["Low", "Heroes"]
+    assert r.json[0]["pid"] != os.getpid()
+
+
+def test_wrapped_after_start():
+    pool = OffloadPool(processes=1)
+    early = pool.wrap(lambda: os.getpid())
+    pool.start()
+    try:
+        late = pool.wrap(lambda: os.getpid())
+        assert early() != os.getpid()
+        assert late() == os.getpid()
+    finally:
+        pool.shutdown()
+
+
+def test_forked_after_start():
+    # As with servers which fork after loading the application.
+    pool = OffloadPool(processes=1)
+    offloaded = pool.wrap(lambda: os.getpid())
+    pool.start()
+    try:
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            signal.alarm(10)
+            try:
+                os.write(write, str(offloaded()).encode())
+                pool.shutdown()
+            finally:
+                os._exit(0)
+        os.close(write)
+        with os.fdopen(read) as fh:
+            result = fh.read()
+        os.waitpid(pid, 0)
+        assert result and int(result) not in (os.getpid(), pid)
+        assert offloaded() != os.getpid()
+    finally:
+        pool.shutdown()
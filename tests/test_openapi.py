@@ -0,0 +1,509 @@
+import gzip
+import json
+import threading
+
+import pytest
+import webtest
+from marshmallow import Schema, fields
+from pyramid.config import Configurator
+from webob import Request
+
+from pyramid_marshmallow import openapi
+from pyramid_marshmallow.openapi import ISpecGenerator, SpecGenerator
+from pyramid_marshmallow.openapi import spec as spec_module
+from pyramid_marshmallow.openapi.spec import (
+    create_base_specs,
+    create_spec,
+    create_specs,
+    list_zones,
+    load_merge,
+    split_docstring,
+)
+from pyramid_marshmallow.openapi.watch import MergeWatcher
+
+SETTINGS = {
+    "openapi.title": "Sample",
+    "openapi.version": "1.0",
+    "openapi.openapi_version": "3.0.2",
+}
+
+
+def view(request):
+    """
+    Look at an album.
+
+    """
+    return {}
+
+
+@pytest.fixture
+def registry():
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        for name in ("one", "two"):
+            config.add_route(name, "/" + name)
+            config.add_view(
+                view,
+                route_name=name,
+                request_method="POST",
+                validate={"title": fields.Str()},
+                marshal={"title": fields.Str()},
+                renderer="json",
+                api_zone=name,
+            )
+        config.commit()
+        return config.registry
+
+
+def test_create_spec(registry):
+    spec = create_spec(registry)
+    assert set(spec["paths"]) == {"/one", "/two"}
+    op = spec["paths"]["/one"]["post"]
+    assert op["summary"] == "Look at an album."
+    assert op["requestBody"]["content"]["application/json"]["schema"] == {
+        "type": "object",
+        "properties": {"title": {"type": "string"}},
+        "additionalProperties": False,
+    }
+
+
+def test_create_spec_zone(registry):
+    spec = create_spec(registry, zone="two")
+    assert spec["paths"]["/one"] == {}
+    assert set(spec["paths"]["/two"]) == {"post"}
+
+
+def test_spec_generator_cached(registry):
+    generator = SpecGenerator(registry)
+    spec = generator("one", None)
+    assert generator("one", []) is spec
+    assert generator("two", None) is not spec
+
+
+def test_spec_generator_warm(registry):
+    generator = SpecGenerator(registry)
+    future = generator.warm(None, None)
+    assert generator(None, None) is future.result(timeout=10)
+    assert generator.warm(None, None) is future
+
+
+def test_spec_generator_single_flight(registry, monkeypatch):
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_create_spec(*args, **kwargs):
+        calls.append(args)
+        started.set()
+        release.wait(10)
+        return {}
+
+    monkeypatch.setattr(openapi, "create_base_spec", slow_create_spec)
+    generator = SpecGenerator(registry)
+    generator.warm(None, None)
+    started.wait(10)
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(generator(None, None))
+    )
+    thread.start()
+    release.set()
+    thread.join(10)
+    assert results == [{}]
+    assert len(calls) == 1
+
+
+def test_spec_generator_failure_not_cached(registry, monkeypatch):
+    def broken_create_spec(*args, **kwargs):
+        raise RuntimeError()
+
+    generator = SpecGenerator(registry)
+    monkeypatch.setattr(openapi, "create_base_spec", broken_create_spec)
+    with pytest.raises(RuntimeError):
+        generator(None, None)
+    monkeypatch.undo()
+    assert set(generator(None, None)["paths"]) == {"/one", "/two"}
+
+
+def test_spec_generator_bad_merge(registry):
+    generator = SpecGenerator(registry)
+    merge = ["no_such_package_xyz:merge.yaml"]
+    for _ in range(2):
+        # Each call fails rather than waiting on the failed build.
+        with pytest.raises(ImportError):
+            generator(None, merge)
+    with pytest.raises(ImportError):
+        generator.warm(None, merge).result(timeout=10)
+    assert generator.futures == {}
+
+
+def test_warm_on_startup():
+    with Configurator(
+        settings=dict(SETTINGS, **{"openapi.warm": "true"})
+    ) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        config.add_route("spec", "/spec.json")
+        config.add_openapi_json_view(route_name="spec", zone="one")
+        app = config.make_wsgi_app()
+    generator = app.registry.getUtility(ISpecGenerator)
+    future = generator.futures[("one", ())]
+    assert future.result(timeout=10)["paths"] == {"/spec.json": {}}
+
+
+@pytest.fixture
+def spec_app():
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        config.add_route("json", "/spec.json")
+        config.add_openapi_json_view(route_name="json")
+        config.add_route("yaml", "/spec.yaml")
+        config.add_openapi_yaml_view(route_name="yaml")
+        config.add_route("html", "/spec.html")
+        config.add_openapi_html_view(route_name="html")
+        return webtest.TestApp(config.make_wsgi_app())
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_spec_view_int_keys(tmp_path, backend):
+    pytest.importorskip(backend)
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text(
+        "paths:\n  /one:\n    get:\n      responses:\n"
+        "        404:\n          description: Not found\n"
+    )
+    settings = dict(
+        SETTINGS,
+        **{
+            "marshmallow.json_backend": backend,
+            "openapi.merge": str(mergefile),
+        },
+    )
+    with Configurator(settings=settings) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        config.add_route("json", "/spec.json")
+        config.add_openapi_json_view(route_name="json")
+        app = webtest.TestApp(config.make_wsgi_app())
+    res = app.get("/spec.json")
+    responses = res.json["paths"]["/one"]["get"]["responses"]
+    assert responses == {"404": {"description": "Not found"}}
+
+
+def test_spec_view_caching_headers(spec_app):
+    res = spec_app.get("/spec.json")
+    assert res.json["info"]["title"] == "Sample"
+    assert res.headers["Cache-Control"] == "no-cache"
+    assert res.headers["Vary"] == "Accept-Encoding"
+    assert "Content-Encoding" not in res.headers
+    etag = res.headers["ETag"]
+    res = spec_app.get("/spec.json", headers={"If-None-Match": etag})
+    assert res.status_int == 304
+    assert res.body == b""
+    pretty = spec_app.get("/spec.json?pretty")
+    assert pretty.json == spec_app.get("/spec.json").json
+    assert pretty.headers["ETag"] != etag
+
+
+def test_spec_view_gzip(spec_app):
+    identity = Request.blank("/spec.yaml").get_response(spec_app.app)
+    request = Request.blank("/spec.yaml", headers={"Accept-Encoding": "gzip"})
+    res = request.get_response(spec_app.app)
+    assert "Content-Encoding" not in identity.headers
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert res.headers["ETag"] != identity.headers["ETag"]
+    assert gzip.decompress(res.body) == identity.body
+    assert identity.content_type == "text/yaml"
+
+
+def test_spec_view_html(spec_app):
+    res = spec_app.get("/spec.html")
+    assert res.content_type == "text/html"
+    assert b"<title>Sample 1.0</title>" in res.body
+
+
+def test_spec_generator_render_cached(registry):
+    generator = SpecGenerator(registry)
+    rendered = generator.render(None, None, "json")
+    assert generator.render(None, None, "json") is rendered
+    assert json.loads(rendered.bodies["identity"]) == generator(None, None)
+
+
+def test_create_spec_merge(registry, tmp_path):
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text("info:\n  description: Merged\n")
+    merges = [str(mergefile)]
+    registry.settings["openapi.merge"] = str(mergefile)
+    spec = create_spec(registry, merge=merges)
+    assert spec["info"]["description"] == "Merged"
+    assert merges == [str(mergefile)]
+
+
+def test_merge_watcher(tmp_path):
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text("info: {}\n")
+    calls = []
+    watcher = MergeWatcher([str(mergefile)], lambda: calls.append(1))
+    assert not watcher.check()
+    mergefile.write_text("info:\n  description: Changed\n")
+    assert watcher.check()
+    assert not watcher.check()
+    mergefile.unlink()
+    assert watcher.check()
+    assert calls == [1, 1]
+
+
+def test_spec_generator_merge_changed(registry, tmp_path, monkeypatch):
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text("info:\n  description: Before\n")
+    generator = SpecGenerator(registry)
+    spec = generator(None, [str(mergefile)])
+    assert spec["info"]["description"] == "Before"
+    assert generator(None, [str(mergefile)]) is spec
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Application spec should not be regenerated.")
+
+    monkeypatch.setattr(openapi, "create_base_spec", fail)
+    mergefile.write_text("info:\n  description: After\n")
+    spec = generator(None, [str(mergefile)])
+    assert spec["info"]["description"] == "After"
+    assert generator(None, [str(mergefile)]) is spec
+    generator.reload_merges()
+    assert generator(None, [str(mergefile)]) is not spec
+
+
+def test_load_merge_cached(tmp_path, monkeypatch):
+    mergefile = tmp_path / "merge.yaml"
+    mergefile.write_text("info:\n  description: Before\n")
+    doc = load_merge(str(mergefile))
+    doc["info"]["description"] = "Mutated"
+    calls = []
+    monkeypatch.setattr(
+        spec_module.yaml, "load", lambda *a, **kw: calls.append(1)
+    )
+    assert load_merge(str(mergefile)) == {"info": {"description": "Before"}}
+    assert calls == []
+    monkeypatch.undo()
+    mergefile.write_text("info:\n  description: After\n")
+    assert load_merge(str(mergefile)) == {"info": {"description": "After"}}
+
+
+def test_split_docstring():
+    docstring = """
+    Look at an album.
+
+    Albums are great.
+
+    ---
+    responses:
+        404:
+            description: Not found.
+
+    """
+    summary, descr, parsed = split_docstring(docstring)
+    assert summary == "Look at an album."
+    assert descr == "Albums are great."
+    assert parsed == {"responses": {404: {"description": "Not found."}}}
+    # The parsed YAML is cached, mutating it mustn't affect later calls.
+    parsed["responses"][404]["description"] = "Changed"
+    assert split_docstring(docstring)[2] == {
+        "responses": {404: {"description": "Not found."}}
+    }
+    assert split_docstring(None) == (None, None, {})
+
+
+class ArtistSchema(Schema):
+    name = fields.Str()
+
+
+class AlbumSchema(Schema):
+    title = fields.Str()
+    artist = fields.Nested(ArtistSchema)
+
+
+class TrackSchema(Schema):
+    title = fields.Str()
+
+
+class AlbumResource:
+    __tag__ = {"name": "album", "description": "Albums."}
+
+
+class TrackResource:
+    __tag__ = {"name": "track", "description": "Tracks."}
+
+
+def tag_hook(registry, spec, plugin):
+    spec.tag({"name": "explicit"})
+
+
+@pytest.fixture
+def zoned_registry():
+    settings = dict(SETTINGS, **{"openapi.plugin_hook": tag_hook})
+    with Configurator(settings=settings) as config:
+        config.include("pyramid_marshmallow")
+        views = [
+            ("albums", "GET", "public", AlbumSchema, AlbumResource),
+            ("album", "POST", "admin", AlbumSchema, AlbumResource),
+            ("tracks", "GET", "public", TrackSchema, TrackResource),
+            ("track", "PUT", "admin", TrackSchema, None),
+            ("status", "GET", None, None, None),
+        ]
+        for name, method, zone, schema, context in views:
+            config.add_route(name, "/" + name)
+            config.add_view(
+                view,
+                route_name=name,
+                request_method=method,
+                context=context,
+                marshal=schema() if schema else None,
+                renderer="json",
+                api_zone=zone,
+            )
+        config.commit()
+        return config.registry
+
+
+def test_list_zones(zoned_registry):
+    assert list_zones(zoned_registry) == ["admin", "public"]
+
+
+def test_create_specs(zoned_registry):
+    zones = [None, "admin", "public", "missing"]
+    specs = create_specs(zoned_registry, zones)
+    assert list(specs) == zones
+    for zone in zones:
+        assert specs[zone] == create_spec(zoned_registry, zone=zone)
+    assert set(specs["admin"]["components"]["schemas"]) == {
+        "Album",
+        "Artist",
+        "Track",
+    }
+    assert [tag["name"] for tag in specs["public"]["tags"]] == [
+        "explicit",
+        "album",
+        "track",
+    ]
+    assert "components" not in specs["missing"]
+
+
+def test_create_specs_conflict(registry):
+    # Both zones have `POST /one`, so the zones can't be split apart.
+    with Configurator(registry=registry) as config:
+        config.add_view(
+            view,
+            route_name="one",
+            request_method="POST",
+            request_param="other",
+            api_zone="two",
+        )
+    specs = create_specs(registry, ["one", "two"])
+    assert specs["one"] == create_spec(registry, zone="one")
+    assert specs["two"] == create_spec(registry, zone="two")
+
+
+def _user_schema(field):
+    # Schemas with the same name in different modules.
+    return type("UserSchema", (Schema,), {field: fields.Str()})
+
+
+@pytest.mark.filterwarnings("ignore:Multiple schemas resolved to the name")
+def test_create_specs_name_collision():
+    with Configurator(settings=dict(SETTINGS)) as config:
+        config.include("pyramid_marshmallow")
+        config.include("pyramid_marshmallow.openapi")
+        for zone, field in [("za", "name"), ("zb", "email")]:
+            config.add_route(zone, "/" + zone)
+            config.add_view(
+                view,
+                route_name=zone,
+                marshal=_user_schema(field)(),
+                api_zone=zone,
+            )
+        registry = config.registry
+    specs = create_specs(registry, ["za", "zb"])
+    for zone in ("za", "zb"):
+        assert specs[zone] == create_spec(registry, zone=zone)
+        assert list(specs[zone]["components"]["schemas"]) == ["User"]
+
+
+def test_spec_generator_warm_many(zoned_registry, monkeypatch):
+    calls = []
+
+    def spy(registry, zones):
+        calls.append(zones)
+        return create_base_specs(registry, zones)
+
+    monkeypatch.setattr(openapi, "create_base_specs", spy)
+    generator = SpecGenerator(zoned_registry)
+    futures = generator.warm_many([("admin", None), ("public", None)])
+    admin, public = [future.result(timeout=10) for future in futures]
+    assert calls == [["admin", "public"]]
+    assert admin == create_spec(zoned_registry, zone="admin")
+    assert public == create_spec(zoned_registry, zone="public")
+
+
+def test_spec_generator_bounded(registry):
+    generator = SpecGenerator(registry, maxsize=2)
+    one = generator("one", None)
+    generator("two", None)
+    assert generator("one", None) is one
+    generator(None, None)
+    # "two" was the least recently used, so it was evicted.
+    assert set(generator.futures) == {("one", ()), (None, ())}
+    stats = generator.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["builds"] == 3
+    assert stats["build_time"] > 0
+    assert stats["size"] == 2
+
+
+def test_spec_generator_cache_size_setting(registry):
+    registry.settings["openapi.cache_size"] = "5"
+    assert SpecGenerator(registry).maxsize == 5
+
+
+def test_spec_generator_invalidate(registry, monkeypatch):
+    calls = []
+
+    def spy(registry, zone=None):
+        calls.append(zone)
+        return create_spec(registry, zone=zone)
+
+    monkeypatch.setattr(openapi, "create_base_spec", spy)
+    generator = SpecGenerator(registry)
+    one = generator("one", None)
+    two = generator("two", None)
+    generator.render("one", None, "json")
+    generator.invalidate("one")
+    assert generator("two", None) is two
+    assert generator("one", None) is not one
+    assert generator.rendered == {}
+    assert calls == ["one", "two", "one"]
+    generator.invalidate()
+    generator("two", None)
+    assert calls == ["one", "two", "one", "two"]
+
+
+@pytest.mark.parametrize("openapi_version", ["2.0", "3.0.2"])
+def test_create_spec_marshal_fields(openapi_version):
+    settings = dict(SETTINGS, **{"openapi.openapi_version": openapi_version})
+    with Configurator(settings=settings) as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("album", "/album")
+        config.add_view(
+            view,
+            route_name="album",
+            marshal={"title": fields.Str()},
+            marshal_fields=True,
+            renderer="json",
+        )
+        config.commit()
+        spec = create_spec(config.registry)
+    params = spec["paths"]["/album"]["get"]["parameters"]
+    assert [(p["in"], p["name"]) for p in params] == [("query", "fields")]
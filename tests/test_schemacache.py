@@ -0,0 +1,91 @@
+import functools
+
+import pytest
+from marshmallow import Schema, ValidationError, fields, validate
+from pyramid.registry import Registry
+
+from pyramid_marshmallow import process_schema
+from pyramid_marshmallow.schemacache import (
+    ISchemaCache,
+    SchemaCache,
+    fingerprint,
+)
+
+
+class ArtistSchema(Schema):
+    name = fields.Str()
+
+
+def album_fields(**kwargs):
+    return {
+        "title": fields.Str(required=True, validate=validate.Length(max=20)),
+        "release_date": fields.Date(**kwargs),
+        "artists": fields.List(fields.Nested(ArtistSchema(only=("name",)))),
+    }
+
+
+def test_fingerprint_equal():
+    assert fingerprint(album_fields()) == fingerprint(album_fields())
+    assert fingerprint(album_fields()) is not None
+
+
+def test_fingerprint_options():
+    assert fingerprint(album_fields()) != fingerprint(
+        album_fields(allow_none=True)
+    )
+    assert fingerprint({"a": fields.Str(required=True)}) != fingerprint(
+        {"a": fields.Str(required=1)}
+    )
+    assert fingerprint({"a": fields.Str()}) != fingerprint({"b": fields.Str()})
+    assert fingerprint({"a": fields.Nested(ArtistSchema())}) != fingerprint(
+        {"a": fields.Nested(ArtistSchema(many=True))}
+    )
+
+
+def test_fingerprint_order():
+    a, b = fields.Str(), fields.Int()
+    assert fingerprint({"a": a, "b": b}) != fingerprint({"b": b, "a": a})
+
+
+def test_fingerprint_unhashable():
+    class Thing:
+        __slots__ = ()
+        __hash__ = None
+
+    assert fingerprint({"a": fields.Str(metadata={"x": Thing()})}) is None
+
+
+def at_most(limit, value):
+    if value > limit:
+        raise ValidationError(f"Must be at most {limit}.")
+
+
+def test_fingerprint_partial():
+    def make(limit):
+        check = functools.partial(at_most, limit)
+        return {"n": fields.Int(validate=check)}
+
+    assert fingerprint(make(5)) != fingerprint(make(50))
+    cache = SchemaCache()
+    loose = cache.get(make(50))
+    strict = cache.get(make(5))
+    assert strict is not loose
+    assert loose.load({"n": 10}) == {"n": 10}
+    with pytest.raises(ValidationError):
+        strict.load({"n": 10})
+
+
+def test_schema_cache():
+    cache = SchemaCache()
+    schema = cache.get(album_fields())
+    assert isinstance(schema, Schema)
+    assert cache.get(album_fields()) is schema
+    assert cache.get(album_fields(allow_none=True)) is not schema
+
+
+def test_process_schema_registry():
+    registry = Registry("testing")
+    registry.registerUtility(SchemaCache(), ISchemaCache)
+    schema = process_schema(album_fields(), registry)
+    assert process_schema(album_fields(), registry) is schema
+    assert process_schema(album_fields()) is not schema
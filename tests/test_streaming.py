@@ -0,0 +1,72 @@
+import json
+from io import BytesIO
+
+import pytest
+
+from pyramid_marshmallow.streaming import (
+    iter_json_array,
+    iter_json_array_items,
+)
+
+
+def test_iter_json_array():
+    assert b"".join(iter_json_array(range(3), str)) == b'["0", "1", "2"]'
+
+
+def test_iter_json_array_empty():
+    assert list(iter_json_array([], str)) == [b"[]"]
+
+
+def test_iter_json_array_chunks():
+    chunks = list(iter_json_array(range(1000), str, chunk_size=100))
+    assert len(chunks) > 1
+    assert all(len(chunk) < 110 for chunk in chunks)
+    assert json.loads(b"".join(chunks)) == [str(i) for i in range(1000)]
+
+
+DOCUMENTS = [
+    [],
+    [1],
+    [12345, -1.5e10, True, None, "a, b]"],
+    [{"title": "Hunky Dory", "tracks": [1, {"x": "]"}]}, {"a": "\u00e9"}],
+    ["\U0001f3b8" * 10, 1234567890],
+]
+
+
+@pytest.mark.parametrize("doc", DOCUMENTS)
+@pytest.mark.parametrize("chunk_size", [1, 3, 64])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_array_items(doc, chunk_size, indent):
+    body = json.dumps(doc, indent=indent, ensure_ascii=False).encode("utf-8")
+    items = iter_json_array_items(BytesIO(body), chunk_size=chunk_size)
+    assert list(items) == doc
+
+
+def test_iter_json_array_items_lazy():
+    fh = BytesIO(b"[" + b", ".join([b'"abc"'] * 1000) + b"]")
+    items = iter_json_array_items(fh, chunk_size=16)
+    assert next(items) == "abc"
+    assert fh.tell() < 64
+
+
+@pytest.mark.parametrize(
+    "item", [b'{"title" "Low"}', b'{"title": Low}', b'{"title": "\\x"}']
+)
+def test_iter_json_array_items_malformed_early(item):
+    fh = BytesIO(b"[" + b", ".join([item] + [b'"abc"'] * 1000) + b"]")
+    with pytest.raises(json.JSONDecodeError):
+        next(iter_json_array_items(fh, chunk_size=64))
+    assert fh.tell() <= 64
+
+
+def test_iter_json_array_items_not_array():
+    with pytest.raises(TypeError):
+        list(iter_json_array_items(BytesIO(b'{"a": 1}')))
+
+
+@pytest.mark.parametrize(
+    "body", [b"", b"[1, 2", b"[1 2]", b"[1,]", b"[1] 2", b'["abc]']
+)
+def test_iter_json_array_items_malformed(body):
+    with pytest.raises((json.JSONDecodeError, TypeError)):
+        list(iter_json_array_items(BytesIO(body), chunk_size=2))
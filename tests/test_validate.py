@@ -1,9 +1,13 @@
 from datetime import date as Date
-from types import SimpleNamespace
+from io import BytesIO
 from unittest.mock import Mock
 
 import pytest
+from conftest import make_info
 from marshmallow import Schema, ValidationError, fields
+from pyramid import testing
+from pyramid.exceptions import ConfigurationError
+from pyramid.interfaces import IRequestExtensions
 from pyramid.testing import DummyRequest
 from webob.multidict import MultiDict
 
@@ -22,17 +26,15 @@ def view():
 
 @pytest.fixture
 def wrapped(view):
-    info = SimpleNamespace(
-        options={
-            "validate": AlbumSchema(),
-        }
+    info = make_info(
+        validate=AlbumSchema(),
     )
     return view_validator(view, info)
 
 
 def test_no_validate():
     view = Mock()
-    info = SimpleNamespace(options={})
+    info = make_info()
     assert view_validator(view, info) is view
 
 
@@ -90,3 +92,152 @@ def test_validate_error(wrapped, view):
     assert exc.value.normalized_messages() == {
         "release_date": ["Not a valid date."]
     }
+
+
+def test_validate_compiled(view):
+    info = make_info(
+        validate=AlbumSchema(),
+        validate_compiled=True,
+    )
+    wrapped = view_validator(view, info)
+    request = DummyRequest()
+    request.method = "POST"
+    request.json_body = {
+        "title": "Hunky Dory",
+        "release_date": "1971-12-17",
+    }
+    wrapped(object(), request)
+    assert request.data == {
+        "title": "Hunky Dory",
+        "release_date": Date(1971, 12, 17),
+    }
+    request.json_body = {"release_date": "1971-14-17"}
+    with pytest.raises(ValidationError) as exc:
+        wrapped(object(), request)
+    assert exc.value.messages == {"release_date": ["Not a valid date."]}
+
+
+def test_validate_stream(view):
+    info = make_info(
+        validate=AlbumSchema(many=True),
+        validate_stream=True,
+    )
+    wrapped = view_validator(view, info)
+    request = DummyRequest()
+    request.method = "POST"
+    request.body_file = BytesIO(
+        b'[{"title": "Hunky Dory", "release_date": "1971-12-17"},'
+        b' {"title": "Low", "release_date": "1977-14-14"}]'
+    )
+    wrapped(object(), request)
+    assert next(request.data) == {
+        "title": "Hunky Dory",
+        "release_date": Date(1971, 12, 17),
+    }
+    with pytest.raises(ValidationError) as exc:
+        next(request.data)
+    assert exc.value.messages == {1: {"release_date": ["Not a valid date."]}}
+
+
+def test_validate_stream_not_array(view):
+    info = make_info(
+        validate=AlbumSchema(many=True),
+        validate_stream=True,
+    )
+    wrapped = view_validator(view, info)
+    request = DummyRequest()
+    request.method = "POST"
+    request.body_file = BytesIO(b'{"title": "Hunky Dory"}')
+    wrapped(object(), request)
+    with pytest.raises(ValidationError) as exc:
+        list(request.data)
+    assert exc.value.messages == {"_schema": ["Invalid input type."]}
+
+
+def test_validate_stream_requires_many(view):
+    info = make_info(
+        validate=AlbumSchema(),
+        validate_stream=True,
+    )
+    with pytest.raises(ConfigurationError):
+        view_validator(view, info)
+
+
+def test_validate_json_backend(view):
+    pytest.importorskip("orjson")
+    info = make_info(
+        validate=AlbumSchema(),
+        settings={"marshmallow.json_backend": "orjson"},
+    )
+    wrapped = view_validator(view, info)
+    request = DummyRequest()
+    request.method = "POST"
+    request.body = b'{"title": "Hunky Dory", "release_date": "1971-12-17"}'
+    wrapped(object(), request)
+    assert request.data == {
+        "title": "Hunky Dory",
+        "release_date": Date(1971, 12, 17),
+    }
+
+
+def test_validate_get_list(view):
+    class SearchSchema(Schema):
+        q = fields.Str()
+        ids = fields.List(fields.Int())
+        tags = fields.List(fields.Str(), data_key="tag")
+
+    wrapped = view_validator(view, make_info(validate=SearchSchema()))
+    request = DummyRequest()
+    request.method = "GET"
+    request.GET = MultiDict([("q", "first"), ("tag", "rock"), ("q", "last")])
+    request.GET.extend([("ids", str(i)) for i in range(500)])
+    wrapped(object(), request)
+    assert request.data == {
+        "q": "last",
+        "ids": list(range(500)),
+        "tags": ["rock"],
+    }
+
+
+def test_validate_lazy():
+    def view(context, request):
+        if request.params.get("skip"):
+            return None
+        return request.data
+
+    info = make_info(validate=AlbumSchema(), validate_lazy=True)
+    wrapped = view_validator(view, info)
+
+    request = DummyRequest(params={"skip": "1"})
+    request.method = "POST"
+    request.json_body = {"release_date": "invalid"}
+    assert wrapped(None, request) is None
+
+    request = DummyRequest()
+    request.method = "POST"
+    request.json_body = {"title": "Hunky Dory"}
+    assert wrapped(None, request) == {"title": "Hunky Dory"}
+    assert request.data is request.data
+
+    request = DummyRequest()
+    request.method = "POST"
+    request.json_body = {"release_date": "invalid"}
+    with pytest.raises(ValidationError):
+        wrapped(None, request)
+
+
+def test_no_request_extensions():
+    # Request properties make Pyramid create a class for every request.
+    with testing.testConfig() as config:
+        config.include("pyramid_marshmallow")
+        assert config.registry.queryUtility(IRequestExtensions) is None
+
+
+def test_validate_get_ignores_marshal_fields(view):
+    info = make_info(validate=AlbumSchema(), marshal_fields=True)
+    wrapped = view_validator(view, info)
+    request = DummyRequest()
+    request.method = "GET"
+    request.GET = MultiDict({"title": "Hunky Dory", "fields": "title"})
+    wrapped(object(), request)
+    assert request.data == {"title": "Hunky Dory"}
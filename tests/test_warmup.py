@@ -0,0 +1,53 @@
+from marshmallow import Schema, fields
+from pyramid.config import Configurator
+
+
+class WarmTrackSchema(Schema):
+    title = fields.Str()
+
+
+class WarmAlbumSchema(Schema):
+    title = fields.Str()
+    tracks = fields.List(fields.Nested("WarmTrackSchema"))
+    sequel = fields.Nested(lambda: WarmAlbumSchema())
+
+
+def view(request):
+    return {}
+
+
+def test_warm_marshmallow_schemas():
+    schema = WarmAlbumSchema()
+    with Configurator() as config:
+        config.include("pyramid_marshmallow")
+        config.add_route("album", "/album")
+        config.add_view(
+            view,
+            route_name="album",
+            renderer="json",
+            validate=schema,
+            marshal=schema,
+        )
+        config.add_route("search", "/search")
+        config.add_view(
+            view,
+            route_name="search",
+            renderer="json",
+            validate={"q": fields.Str()},
+        )
+        assert schema.fields["tracks"].inner._schema is None
+        report = config.warm_marshmallow_schemas()
+
+    assert schema.fields["tracks"].inner._schema is not None
+    assert schema.fields["sequel"]._schema is not None
+    assert [(r.schema, r.views, r.nested) for r in report] == [
+        (
+            "test_warmup.WarmAlbumSchema",
+            ["album (validate)", "album (marshal)"],
+            2,
+        ),
+        ("abc.GeneratedSchema", ["search (validate)"], 0),
+    ]
+    for item in report:
+        assert item.duration >= 0
+        assert item.memory >= 0